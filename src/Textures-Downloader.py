@@ -12,7 +12,11 @@ import sys  # for the window scrolling
 
 from utils.helpers import load_config_new, save_config_new, ConfigManager
 from utils.sync import main_sync
-from utils.download_repo import download_repo_main
+from utils.download_repo import download_repo_main, plan_install_from_tree
+from utils.fullscan import get_tree_contents
+from utils.preflight import get_free_bytes
+from utils.http_cache import cached_get
+from utils.watcher import start_watching
 
 app_version = "0.24-beta"
 app_version_num = 0.24
@@ -238,6 +242,7 @@ class PostInstallScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
         self.user_choice_var = tk.IntVar(value=1)  
         tk.Radiobutton(radio_buttons, text="Download New Content (recommended)", variable=self.user_choice_var, value=1).grid(row=0, column=0, sticky="e", padx=(0, 10))
         tk.Radiobutton(radio_buttons, text="Full Sync (slower, but can fix issues)", variable=self.user_choice_var, value=2).grid(row=0, column=1, sticky="w", padx=(50, 0))
+        tk.Radiobutton(radio_buttons, text="Verify Files (checks the content of every texture)", variable=self.user_choice_var, value=3).grid(row=0, column=2, sticky="w", padx=(50, 0))
 
         terminal_paned = tk.PanedWindow(self, orient=tk.VERTICAL, sashwidth=5, sashrelief=tk.SUNKEN)
         terminal_paned.grid(row=11, column=0, columnspan=3, padx=10, pady=5, sticky="nsew")
@@ -276,7 +281,7 @@ class PostInstallScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
             self.update_idletasks()  # Force UI update
             
             # Get parameters before starting thread
-            user_choice = "full_scan" if self.user_choice_var.get() == 2 else "only_new_content"
+            user_choice = {2: "full_scan", 3: "verify"}.get(self.user_choice_var.get(), "only_new_content")
             github_token = self.github_token_entry.get()
             last_run_date = self.last_run_date_entry.get()
             
@@ -284,6 +289,10 @@ class PostInstallScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
             self.terminal_text.delete(1.0, tk.END)
             self.update_idletasks()  # Force UI update
             
+            def show_last_run_date(saved_last_run_date):
+                self.last_run_date_entry.delete(0, tk.END)
+                self.last_run_date_entry.insert(0, saved_last_run_date.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3])
+
             def run_sync():
                 try:
                     # Use after() to update UI from the thread
@@ -292,6 +301,10 @@ class PostInstallScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
                 except Exception as e:
                     self.after(0, lambda: self.terminal_text.insert(tk.END, f"Error: {str(e)}\n"))
                 finally:
+                    # Show the Last Sync Date the sync saved, so the next sync doesn't take the old one for a manual edit
+                    saved_last_run_date = ConfigManager().last_run_date
+                    if saved_last_run_date:
+                        self.after(0, lambda: show_last_run_date(saved_last_run_date))
                     # Reset UI state using after()
                     self.after(0, lambda: self.canvas.itemconfig(self.button_bg, fill='#cccccc'))
                     self._sync_running = False
@@ -359,7 +372,7 @@ class PostInstallScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
         try:
             # Fetch the JSON data from the URL
             json_url = self.config_manager.json_url
-            response = requests.get(json_url)
+            response = cached_get(json_url)
             response.raise_for_status()
 
             # Parse the JSON data
@@ -494,16 +507,31 @@ class InstallerScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
             import webbrowser
             webbrowser.open(release_url)
 
-        def get_free_disk_space(directory="/"):
+        def get_free_disk_space(directory=local_directory or "/"):
             try:
-                disk_info = psutil.disk_usage(directory)
-                free_space_gb = disk_info.free / (1024 ** 3)  # Convert bytes to gigabytes
+                # Free space of the drive the textures folder is (or will be) on
+                free_space_gb = get_free_bytes(directory) / (1024 ** 3)  # Convert bytes to gigabytes
                 return free_space_gb
             except PermissionError:
                 # Handle permission error gracefully
                 print(f"Permission error: Unable to access disk space information for {directory}")
                 return None
 
+        def get_install_sizes_from_tree(json_data):
+            # Exact sizes in GB from the Github tree, or None if the tree can't be read (then the JSON's numbers are used)
+            if not github_token:
+                return None
+            try:
+                tree_data = get_tree_contents(owner, repo, subdirectory, branch_name)
+            except (Exception, SystemExit):
+                return None
+            download_plan = plan_install_from_tree(tree_data, json_data.get("download_complete") or [], json_data.get("download_subdirectories") or [])
+            folder_sizes = [sum(item['size'] for item in items) for _, items in download_plan]
+            # Only the zip mode needs temporary space: at least room for its largest zip
+            largest_size_gb = max(folder_sizes, default=0) / (1024 ** 3) if self.config_manager.install_mode == "zip" else 0
+            total_size_gb = sum(folder_sizes) / (1024 ** 3) + largest_size_gb
+            return total_size_gb, largest_size_gb
+
         def run_installer():
             user_choice = "whatever"
             run_subprocess('utils/download_repo.py', user_choice, self.terminal_text, self.master)  
@@ -534,7 +562,7 @@ class InstallerScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
         try:
             # Fetch the JSON data from the URL
             json_url = self.config_manager.json_url
-            response = requests.get(json_url)
+            response = cached_get(json_url)
             response.raise_for_status()
 
             # Parse the JSON data
@@ -581,6 +609,7 @@ class InstallerScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
             release_url = "#"
             total_size_gb = "? GB"
             largest_size_gb = "? GB"
+            json_data = None
 
         # Heading
         heading_label = tk.Label(self, text="First Time Setup – Textures Installation", font=('TkDefaultFont', 18, 'bold'), justify="center")
@@ -652,26 +681,8 @@ class InstallerScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
         button_frame.grid(row=9, columnspan=3, column=0, pady=(0, 10))  # Adjust the pady values as needed
 
         try:
-            # Function to get the color based on free disk space
-            def get_text_color():
-                free_space = get_free_disk_space()
-                if free_space is not None:
-                    return "green" if free_space > total_size_gb else "red"
-                return "black"  # Default color
-
-            # Display the "Requires <total_dl_size> GB free disk space" message
-            if get_free_disk_space() is not None:
-                requirement_label = tk.Label(button_frame, text=f"Requires {total_size_gb:.2f} GB free disk space (including {largest_size_gb:.2f} GB of temporary space)\nYou have {get_free_disk_space():.2f} GB free.")
-            else:
-                requirement_label = tk.Label(button_frame, text=f"Requires {total_size_gb:.2f} GB free disk space (including {largest_size_gb:.2f} GB of temporary space).")
-
-            # Get the text color based on free disk space
-            text_color = get_text_color()
-
-
-            # Apply the text color to the label
+            requirement_label = tk.Label(button_frame)
             requirement_label.grid(row=0, column=0)
-            requirement_label.config(fg=text_color)
 
             def download_repo_main_wrapper():
                 self.terminal_text.delete(1.0, tk.END)
@@ -689,22 +700,57 @@ class InstallerScreen(tk.Frame, DebugModeMixin, OnSaveButtonClickMixin):
                 font=bold_font
             )
             download_button.grid(row=1, column=0)
-            
-            # Display a message and disable the button based on the text_color
-            if text_color == "red":
-                message = "Not enough free disk space to proceed."
-                if debug_mode == False:
-                    download_button.config(state=tk.DISABLED)
-            elif text_color == "green":
-                message = "You have enough disk space. Do you have the time to let this run?"
-                download_button.config(state=tk.NORMAL)  # Ensure the button is enabled
-            else:
-                message = "Error determining free disk space."
 
-            # Display the message below the button
-            message_label = tk.Label(button_frame, text=message)
+            # Message below the button
+            message_label = tk.Label(button_frame)
             message_label.grid(row=2, column=0, pady=(5, 5))
 
+            # Fill in the size requirement, the button state and the message for the given sizes
+            def show_install_sizes(total_size_gb, largest_size_gb):
+                free_space = get_free_disk_space()
+
+                # Display the "Requires <total_dl_size> GB free disk space" message
+                if free_space is not None:
+                    requirement_label.config(text=f"Requires {total_size_gb:.2f} GB free disk space (including {largest_size_gb:.2f} GB of temporary space)\nYou have {free_space:.2f} GB free.")
+                else:
+                    requirement_label.config(text=f"Requires {total_size_gb:.2f} GB free disk space (including {largest_size_gb:.2f} GB of temporary space).")
+
+                # Get the text color based on free disk space
+                if free_space is not None:
+                    text_color = "green" if free_space > total_size_gb else "red"
+                else:
+                    text_color = "black"  # Default color
+                requirement_label.config(fg=text_color)
+
+                # Display a message and disable the button based on the text_color
+                if text_color == "red":
+                    message = "Not enough free disk space to proceed."
+                    if debug_mode == False:
+                        download_button.config(state=tk.DISABLED)
+                elif text_color == "green":
+                    message = "You have enough disk space. Do you have the time to let this run?"
+                    # Ensure the button is enabled (unless the app version is too old, see below)
+                    if app_version_num >= min_version or debug_mode != False:
+                        download_button.config(state=tk.NORMAL)
+                else:
+                    message = "Error determining free disk space."
+                message_label.config(text=message)
+
+            # The JSON's sizes first, then the exact ones from the Github tree once they've been worked out. The tree can
+            # take a while on a big pack, so it's fetched off the main thread and the window stays responsive.
+            if isinstance(total_size_gb, (int, float)) and isinstance(largest_size_gb, (int, float)):
+                show_install_sizes(total_size_gb, largest_size_gb)
+            else:
+                requirement_label.config(text="Working out the download size...")
+
+            def fetch_install_sizes():
+                tree_sizes = get_install_sizes_from_tree(json_data)
+                if tree_sizes:
+                    self.after(0, lambda: show_install_sizes(*tree_sizes))
+
+            if json_data:
+                Thread(target=fetch_install_sizes, daemon=True).start()
+
 
 
 
@@ -893,5 +939,8 @@ class MainApplication(tk.Tk):
 
 
 if __name__ == "__main__":
+    # Track changes to the textures folder in the background, so a Full Sync doesn't have to re-read all of it
+    if config_manager.watch_textures:
+        start_watching(local_directory, slus_folder, config_manager.watch_poll_seconds)
     app = MainApplication()
     app.mainloop()
\ No newline at end of file
@@ -3,17 +3,24 @@ import sys
 import shutil
 import aiohttp
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from tenacity import retry, wait_fixed, stop_after_attempt 
 import zipfile
+import tarfile
 import requests
 from datetime import datetime, timezone, timedelta
 import time
 import pytz
+import psutil
 import tkinter as tk 
 
 
 # Import functions
 from .helpers import *
+from .fullscan import get_tree_contents
+from .preflight import print_preflight, get_free_bytes, record_throughput
+from .http_cache import cached_get
+from .manifest import manifest
 
 
 
@@ -36,6 +43,237 @@ github_repo_url = config_manager.github_repo_url
 # Initialize user_choice_var as a global variable
 user_choice_var = config_manager.user_choice_var
 
+# Progress journal for resuming an interrupted install
+install_journal_path = "utils/install_journal.txt"
+
+
+def stream_archive_to_directory(archive_url, headers, local_directory, subdirectory, slus_folder, terminal_text, status_interval=5):
+    """Stream a repository tarball and extract only the files under <subdirectory>/<slus_folder>/replacements while it downloads"""
+    wanted_prefix = f"{subdirectory}/{slus_folder}/replacements/"
+    files_extracted = 0
+    bytes_extracted = 0
+    last_status = time.monotonic()
+
+    with requests.get(archive_url, headers=headers, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        # Let urllib3 undo any transfer encoding so tarfile only sees the archive bytes
+        response.raw.decode_content = True
+
+        # 'r|*' reads the archive as a forward-only stream, so nothing is buffered to disk first
+        with tarfile.open(fileobj=response.raw, mode='r|*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+
+                # Github tarballs put everything in a top-level "owner-repo-sha/" folder
+                repo_path = member.name
+                if not repo_path.startswith(wanted_prefix):
+                    parts = repo_path.split('/', 1)
+                    repo_path = parts[1] if len(parts) == 2 else ''
+                if not repo_path.startswith(wanted_prefix):
+                    continue
+
+                # Never write outside of the textures folder
+                path_parts = repo_path.split('/')
+                if '..' in path_parts or os.path.isabs(repo_path):
+                    terminal_text.insert(tk.END, f"Skipping unsafe path in archive: {member.name}\n")
+                    continue
+
+                destination = os.path.join(local_directory, *repo_path[len(subdirectory) + 1:].split('/'))
+                temp_path = make_temp_file_path(destination)
+                try:
+                    with archive.extractfile(member) as source, open(temp_path, 'wb') as f:
+                        shutil.copyfileobj(source, f, 65536)
+                    os.replace(temp_path, destination)
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+
+                files_extracted += 1
+                bytes_extracted += member.size
+
+                if time.monotonic() - last_status >= status_interval:
+                    last_status = time.monotonic()
+                    terminal_text.insert(tk.END, f"Status update: {files_extracted} files ({bytes_extracted / (1024 * 1024):.1f} MB) extracted from the archive.\n")
+                    terminal_text.see(tk.END)
+
+    return files_extracted, bytes_extracted
+
+
+class AdaptiveLimiter:
+    """Download concurrency that grows while throughput keeps improving and backs off when Github rate limits us"""
+
+    def __init__(self, initial=4, minimum=1, maximum=16, window=5):
+        self.limit = max(minimum, min(initial, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window = window
+        self.in_flight = 0
+        self.throughput = 0.0  # bytes per second over the last full window
+        self.paused_until = 0.0
+        self._condition = asyncio.Condition()
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._window_saturated = False
+
+    async def acquire(self):
+        async with self._condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    # Sleep out a Retry-After / rate limit pause before starting anything new
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), pause)
+                    except asyncio.TimeoutError:
+                        pass
+                elif self.in_flight >= self.limit:
+                    await self._condition.wait()
+                else:
+                    break
+            self.in_flight += 1
+            if self.in_flight >= self.limit:
+                self._window_saturated = True
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record_bytes(self, byte_count):
+        self._window_bytes += byte_count
+        elapsed = time.monotonic() - self._window_start
+        if elapsed < self.window:
+            return
+
+        throughput = self._window_bytes / elapsed
+        # Only grow when every slot was busy, otherwise more slots can't be the bottleneck
+        if self._window_saturated and throughput > self.throughput * 1.05 and self.limit < self.maximum:
+            self.limit += 1
+        elif throughput < self.throughput * 0.8 and self.limit > self.minimum:
+            self.limit -= 1
+        self.throughput = throughput
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._window_saturated = self.in_flight >= self.limit
+
+    async def wait_for_pause(self):
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    def back_off(self, retry_after=None):
+        # Halve concurrency and pause new requests (Retry-After seconds if Github sent one)
+        self.limit = max(self.minimum, self.limit // 2)
+        self.paused_until = max(self.paused_until, time.monotonic() + (retry_after if retry_after else 10))
+
+
+class DiskBudget:
+    """Admits downloads only while the bytes staged on disk (zips, partial files) fit within a budget"""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.in_use = 0
+        self.peak = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, byte_count):
+        async with self._condition:
+            # Something larger than the whole budget still gets in, but only when nothing else is staged
+            while self.in_use > 0 and self.in_use + byte_count > self.budget_bytes:
+                await self._condition.wait()
+            self.in_use += byte_count
+            self.peak = max(self.peak, self.in_use)
+
+    async def release(self, byte_count):
+        async with self._condition:
+            self.in_use -= byte_count
+            self._condition.notify_all()
+
+
+def is_rate_limited(status, response_headers, body_text=''):
+    """True for 403/429 responses that mean Github wants us to slow down (primary or secondary rate limits)"""
+    if status == 429 or 'Retry-After' in response_headers:
+        return True
+    if status == 403:
+        return response_headers.get('X-RateLimit-Remaining') == '0' or 'rate limit' in body_text.lower()
+    return False
+
+
+class InstallJournal:
+    """Append-only record of the files an install has finished, so a restarted install can pick up where it stopped"""
+
+    def __init__(self, journal_path, local_directory, slus_folder):
+        self.journal_path = journal_path
+        self.header = f"# {local_directory} | {slus_folder}"
+        self.completed = {}  # repo path -> blob sha
+        self._file = None
+
+    def load(self):
+        # Returns True if a journal for this same textures folder and SLUS folder was found
+        if not os.path.exists(self.journal_path):
+            return False
+        with open(self.journal_path, 'r', encoding='utf-8') as journal_file:
+            lines = journal_file.read().splitlines()
+        if not lines or lines[0] != self.header:
+            return False
+        for line in lines[1:]:
+            # A line cut off by a crash has no path after the sha, so it is ignored
+            sha, _, path = line.partition(' ')
+            if len(sha) == 40 and path:
+                self.completed[path] = sha
+        return True
+
+    def is_done(self, item, local_path):
+        # Only trust the journal if the file is still on disk with the size the tree says it should have
+        if self.completed.get(item['path']) != item['sha']:
+            return False
+        try:
+            return os.path.getsize(local_path) == item['size']
+        except OSError:
+            return False
+
+    def open(self, resuming):
+        self._file = open(self.journal_path, 'a' if resuming else 'w', encoding='utf-8')
+        if not resuming:
+            self._file.write(self.header + '\n')
+            self._file.flush()
+
+    def record(self, item):
+        self.completed[item['path']] = item['sha']
+        self._file.write(f"{item['sha']} {item['path']}\n")
+        self._file.flush()
+
+    def close(self, finished=False):
+        if self._file:
+            self._file.close()
+            self._file = None
+        if finished and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+def plan_install_from_tree(tree_data, download_complete, download_subdirectories):
+    """Group the tree's blobs into the folders the installer downloads, as a list of (directory, [{path, size, sha}])"""
+    blobs = [{'path': tree_item_path(item, subdirectory), 'size': item.get('size', 0), 'sha': item['sha']} for item in tree_data if item['type'] == 'blob']
+
+    # Whole folders, plus every direct child folder of the folders that get split up. The child folders come from
+    # the blob paths, because a truncated tree is fetched per subtree and has no entries for the subtrees themselves.
+    selected_directories = [directory.rstrip('/') for directory in download_complete]
+    for parent in download_subdirectories:
+        parent = parent.rstrip('/') + '/'
+        child_folders = {parent + blob['path'][len(parent):].split('/')[0] for blob in blobs if blob['path'].startswith(parent) and '/' in blob['path'][len(parent):]}
+        selected_directories.extend(sorted(child_folders))
+
+    # Walk up each blob's parent folders until one of the selected directories is found
+    download_plan = {directory: [] for directory in selected_directories}
+    for blob in blobs:
+        directory = blob['path'].rpartition('/')[0]
+        while directory and directory not in download_plan:
+            directory = directory.rpartition('/')[0]
+        if directory:
+            download_plan[directory].append(blob)
+
+    return [(directory, items) for directory, items in download_plan.items() if items]
+
 
 def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
     loop = asyncio.new_event_loop()  # Create a new event loop
@@ -43,126 +281,227 @@ def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
  
     # Other variables
     github_repo_url = f"{owner}/{repo}"
-    api_url = f"https://api.github.com/repos/{github_repo_url}/commits?sha={branch_name}"
     headers = {"Authorization": f"Bearer {github_token}"}
 
-    # Number of concurrent downloads
-    semaphore = asyncio.Semaphore(2) 
+    # Most zips open at once (how many actually run is decided by the disk budget below)
+    semaphore = asyncio.Semaphore(8) 
+
+    # Number of concurrent file downloads, adjusted while the install runs
+    limiter = AdaptiveLimiter(maximum=config_manager.max_concurrent_downloads)
+
+    # Write files straight to their final path unless the zip staging mode was chosen
+    install_mode = config_manager.install_mode
 
     def scroll_terminal():
         terminal_text.yview(tk.END) 
         terminal_text.see(tk.END)
 
-    # Function to grab a list of directories inside a particular directory
-    def get_subdirectory_names(api_url, headers, local_directory, subdirectory):
-        selected_directories = []
-        content_url = f"https://api.github.com/repos/{github_repo_url}/contents/{subdirectory}?ref={branch_name}"
-        content_response = requests.get(content_url, headers=headers)
-
-        if content_response.status_code == 200:
-            content_data = content_response.json()
-            for item in content_data:
-                if item['type'] == 'dir':
-                    directory_name = item['name']
-                    selected_directories.append(f"{subdirectory}/{directory_name}")
-        else:
-            terminal_text.insert(tk.END, f"get_subdirectory_names failed for {subdirectory}\n")
-            scroll_terminal() 
+    # Number of zips extracted at the same time, each on its own worker thread
+    extract_workers = 2
 
-        return selected_directories
+    # Define a queue to store finished zips waiting for extraction. It's bounded, so downloads
+    # wait for extraction to catch up instead of piling up zips on the disk.
+    zip_queue = asyncio.Queue(maxsize=extract_workers)
+    extract_pool = ThreadPoolExecutor(max_workers=extract_workers, thread_name_prefix="unzip")
 
-    # Define a queue to store zip file names
-    zip_queue = asyncio.Queue()
+    # Delete a zip that failed. Its space only goes back to the disk budget once it's gone from the disk.
+    def discard_zip(zip_file_path):
+        try:
+            if os.path.exists(zip_file_path):
+                os.remove(zip_file_path)
+            return True
+        except OSError as e:
+            terminal_text.insert(tk.END, f"Couldn't delete {os.path.basename(zip_file_path)}: {e}\n")
+            scroll_terminal()
+            return False
 
     async def process_zip_queue(local_directory):
+        loop = asyncio.get_running_loop()
         while True:
-            # Get the next zip file from the queue
-            zip_file_path = await zip_queue.get()
+            # Get the next zip file (and the files inside it) from the queue
+            queued_zip = await zip_queue.get()
 
             # Break the loop if the sentinel is encountered
-            if zip_file_path is None:
+            if queued_zip is None:
+                zip_queue.task_done()
                 break
 
-            # Unzip the file after writing all contents
-            unzip_file(local_directory, zip_file_path)
+            zip_file_path, items, zip_bytes = queued_zip
+            try:
+                # Extract on the worker pool so the event loop keeps downloading meanwhile
+                await loop.run_in_executor(extract_pool, unzip_file, local_directory, zip_file_path)
+                for item in items:
+                    journal.record(item)
+                    # Checked against the tree SHA when it was downloaded into the zip
+                    manifest.record(local_path_for(item['path']), item['sha'])
+                progress_stats["files_installed"] += len(items)
+                await disk_budget.release(zip_bytes)
+            except Exception as e:
+                # Leave these files out of the journal so the next run downloads them again
+                terminal_text.insert(tk.END, f"Error extracting {os.path.basename(zip_file_path)}: {e}\n")
+                scroll_terminal()
+                if discard_zip(zip_file_path):
+                    await disk_budget.release(zip_bytes)
 
             # Mark the task as done
             zip_queue.task_done()
 
 
-    async def download_repo_split_async(api_url, headers, local_directory, selected_directories, progress_printer):
-        async with aiohttp.ClientSession() as session:
-            tasks = [download_subdirectory_async(session, api_url, headers, local_directory, directory, progress_printer) for directory in selected_directories]
-            await asyncio.gather(*tasks)
+    # Keep track of how many connections were opened (TCP+TLS handshakes) versus reused from the pool
+    connection_stats = {"created": 0, "reused": 0}
 
-    async def download_subdirectory_async(session, api_url, headers, local_directory, subdirectory, progress_printer):
+    async def on_connection_create_end(session, trace_config_ctx, params):
+        connection_stats["created"] += 1
 
-        content_url = f"https://api.github.com/repos/{github_repo_url}/contents/{subdirectory}?ref={branch_name}"
+    async def on_connection_reuseconn(session, trace_config_ctx, params):
+        connection_stats["reused"] += 1
 
-        async with semaphore:
-            async with session.get(content_url, headers=headers, timeout=300) as content_response:
-                subdirectory_trimmed = subdirectory.removeprefix(f"textures/{slus_folder}/replacements/")
-                try:
-                    if content_response.status == 200:
-                        zip_file_path = os.path.join(local_directory, f"{subdirectory.replace('/', '_')}.zip")
-                        content_data = await content_response.json()
+    async def download_repo_split_async(headers, local_directory, download_plan, progress_reporter):
+        # One pooled session for the whole install so every file reuses kept-alive connections
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        connector = aiohttp.TCPConnector(limit_per_host=config_manager.max_connections_per_host, ttl_dns_cache=300, keepalive_timeout=60)
 
-                        total_files = len(content_data)
-                        files_downloaded = 0
+        # Report progress on a timer from a separate task so downloads never wait on it
+        reporter_task = asyncio.create_task(progress_reporter())
 
-                        terminal_text.insert(tk.END, f"Downloading next zip ({subdirectory_trimmed})...\n")
-                        scroll_terminal() 
+        try:
+            async with aiohttp.ClientSession(connector=connector, trace_configs=[trace_config]) as session:
+                tasks = [download_subdirectory_async(session, headers, local_directory, directory, items) for directory, items in download_plan]
+                await asyncio.gather(*tasks)
+        finally:
+            reporter_task.cancel()
+
+    # Local path for a repo path, with the repo's subdirectory (eg. "textures") stripped off
+    def local_path_for(repo_path):
+        return os.path.join(local_directory, os.path.relpath(repo_path, config_manager.subdirectory))
+
+    # Start a download for every item, but only as fast as the limiter hands out slots. Returns the items that made it.
+    async def download_items_async(session, headers, items, zip_file):
+        tasks = []
+        for item in items:
+            # Files going straight to disk reserve their own size; zips already reserved theirs as a whole
+            if zip_file is None:
+                await disk_budget.acquire(item['size'])
+            await limiter.acquire()
+            tasks.append(asyncio.create_task(download_item_with_slot_async(session, headers, item, zip_file)))
+        # One failed file (after its retries) doesn't stop the rest of the folder; it stays out of the journal
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return [item for item, result in zip(items, results) if not isinstance(result, BaseException)]
+
+    async def download_item_with_slot_async(session, headers, item, zip_file):
+        try:
+            await download_item_async(session, headers, item, zip_file)
+        finally:
+            await limiter.release()
+            if zip_file is None:
+                await disk_budget.release(item['size'])
 
-                        with zipfile.ZipFile(zip_file_path, 'w') as zip_file:
-                            for item in content_data:
-                                await download_item_async(api_url, headers, local_directory, subdirectory, item, zip_file)
-                                files_downloaded += 1
+    async def download_subdirectory_async(session, headers, local_directory, subdirectory, items):
+        subdirectory_trimmed = subdirectory.removeprefix(f"textures/{slus_folder}/replacements/")
 
-                                # Print progress message every 5 seconds
-                                if files_downloaded % 5 == 0:
-                                    progress_printer(subdirectory_trimmed, files_downloaded, total_files)
-                                    await asyncio.sleep(5)  # Sleep for 5 seconds
+        if install_mode != "zip":
+            try:
+                terminal_text.insert(tk.END, f"Downloading next folder ({subdirectory_trimmed})...\n")
+                scroll_terminal()
 
-                        terminal_text.insert(tk.END, f"Finished zip ({subdirectory_trimmed}) - {files_downloaded}/{total_files} items. Extracting...\n")
-                        scroll_terminal() 
+                downloaded_items = await download_items_async(session, headers, items, None)
 
-                        # Unzip the file after writing all contents
-                        unzip_file(local_directory, zip_file_path)
-                    else:
-                        terminal_text.insert(tk.END, f"Failed to get content information: {content_response.status}\n")
-                        scroll_terminal() 
+                if len(downloaded_items) == len(items):
+                    terminal_text.insert(tk.END, f"Finished folder ({subdirectory_trimmed}) - {len(items)} files.\n")
+                else:
+                    terminal_text.insert(tk.END, f"Finished folder ({subdirectory_trimmed}) - {len(downloaded_items)} of {len(items)} files, {len(items) - len(downloaded_items)} FAILED.\n")
+                scroll_terminal()
+            except Exception as e:
+                terminal_text.insert(tk.END, f"Error downloading subdirectory: {e}\n")
+                scroll_terminal()
+                raise e
+            return
 
-                except Exception as e:
-                    terminal_text.insert(tk.END, f"Error downloading subdirectory: {e}\n")
-                    scroll_terminal() 
-                    raise e
+        # Wait until the whole zip fits in the disk budget; it's given back once the zip is extracted and deleted
+        zip_bytes = sum(item['size'] for item in items)
+        await disk_budget.acquire(zip_bytes)
+
+        async with semaphore:
+            try:
+                zip_file_path = os.path.join(local_directory, f"{subdirectory.replace('/', '_')}.zip")
+
+                terminal_text.insert(tk.END, f"Downloading next zip ({subdirectory_trimmed})...\n")
+                scroll_terminal() 
+
+                with zipfile.ZipFile(zip_file_path, 'w') as zip_file:
+                    downloaded_items = await download_items_async(session, headers, items, zip_file)
+
+                if len(downloaded_items) == len(items):
+                    terminal_text.insert(tk.END, f"Finished zip ({subdirectory_trimmed}) - {len(items)} files. Queued for extraction.\n")
+                else:
+                    terminal_text.insert(tk.END, f"Finished zip ({subdirectory_trimmed}) - {len(downloaded_items)} of {len(items)} files, {len(items) - len(downloaded_items)} FAILED. Queued for extraction.\n")
+                scroll_terminal() 
+
+                # Hand the zip to the extraction workers (waits here while they are behind). Only the files that
+                # are really in the zip get journaled.
+                await zip_queue.put((zip_file_path, downloaded_items, zip_bytes))
+
+            except Exception as e:
+                if discard_zip(zip_file_path):
+                    await disk_budget.release(zip_bytes)
+                terminal_text.insert(tk.END, f"Error downloading subdirectory: {e}\n")
+                scroll_terminal() 
+                raise e
 
     @retry(wait=wait_fixed(2), stop=stop_after_attempt(3))  # Retry every 2 seconds, stop after 3 attempts
-    async def download_item_async(api_url, headers, local_directory, subdirectory, item, zip_file):
+    async def download_item_async(session, headers, item, zip_file):
         try:
-            if item['type'] == 'file':
-                file_path = item['path']
-                content_url = f"https://raw.githubusercontent.com/{github_repo_url}/{branch_name}/{file_path}"
-
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(content_url, headers=headers, timeout=300) as content_response:
-                        if content_response.status == 200:
-                            relative_path = os.path.relpath(file_path, subdirectory)
-                            zip_file.writestr(os.path.join(subdirectory, relative_path), await content_response.content.read())
-                        else:
-                            terminal_text.insert(tk.END, f"Failed to get file content: {content_response.status}\n")
-                            scroll_terminal() 
-
-            elif item['type'] == 'dir':
-                subdir_path = item['path']
-                content_url = f"https://api.github.com/repos/{github_repo_url}/contents/{subdir_path}?ref={branch_name}"
-
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(content_url, headers=headers, timeout=300) as content_response:
-                        if content_response.status == 200:
-                            content_data = await content_response.json()
-                            for sub_item in content_data:
-                                await download_item_async(api_url, headers, local_directory, subdir_path, sub_item, zip_file)
+            file_path = item['path']
+            content_url = f"https://raw.githubusercontent.com/{github_repo_url}/{branch_name}/{file_path}"
+
+            # Honor any rate limit pause even though this download already holds a slot
+            await limiter.wait_for_pause()
+
+            async with session.get(content_url, headers=headers, timeout=300) as content_response:
+                if is_rate_limited(content_response.status, content_response.headers, await content_response.text() if content_response.status == 403 else ''):
+                    retry_after = content_response.headers.get('Retry-After')
+                    limiter.back_off(int(retry_after) if retry_after and retry_after.isdigit() else None)
+                    terminal_text.insert(tk.END, f"Github rate limit hit. Lowering concurrency to {limiter.limit} and pausing...\n")
+                    scroll_terminal()
+                    raise RuntimeError(f"Rate limited ({content_response.status})")
+                elif content_response.status == 200 and zip_file is None:
+                    # Stream into a temp file beside the destination, then swap it in so no partial texture is ever visible
+                    destination = local_path_for(file_path)
+                    temp_path = make_temp_file_path(destination)
+                    # Hash as the bytes arrive, so a bad download is caught (and retried) without reading the file again
+                    blob_hash = new_blob_hash(item['size'])
+                    try:
+                        with open(temp_path, 'wb') as f:
+                            async for chunk in content_response.content.iter_chunked(65536):
+                                f.write(chunk)
+                                blob_hash.update(chunk)
+                                progress_stats["bytes_downloaded"] += len(chunk)
+                                limiter.record_bytes(len(chunk))
+                        if blob_hash.hexdigest() != item['sha']:
+                            raise ValueError(f"Downloaded file doesn't match its Github hash: {file_path}")
+                        os.replace(temp_path, destination)
+                    finally:
+                        if os.path.exists(temp_path):
+                            os.remove(temp_path)
+                    journal.record(item)
+                    manifest.record(destination, item['sha'])
+                    progress_stats["files_downloaded"] += 1
+                    progress_stats["files_installed"] += 1
+                elif content_response.status == 200:
+                    file_content = await content_response.content.read()
+                    blob_hash = new_blob_hash(len(file_content))
+                    blob_hash.update(file_content)
+                    if blob_hash.hexdigest() != item['sha']:
+                        raise ValueError(f"Downloaded file doesn't match its Github hash: {file_path}")
+                    zip_file.writestr(file_path, file_content)
+                    progress_stats["files_downloaded"] += 1
+                    progress_stats["bytes_downloaded"] += len(file_content)
+                    limiter.record_bytes(len(file_content))
+                else:
+                    # Raise so the download is retried, and left out of the journal if it never succeeds
+                    raise RuntimeError(f"Failed to get file content: {content_response.status} ({file_path})")
 
         except Exception as e:
             terminal_text.insert(tk.END, f"Error downloading item: {e}\n")
@@ -177,7 +516,19 @@ def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
         for _ in range(max_retries):
             try:
                 with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-                    zip_ref.extractall(directory)
+                    # Extract every member straight to its final location in the textures folder
+                    for member in zip_ref.infolist():
+                        if member.is_dir():
+                            continue
+                        destination = local_path_for(member.filename)
+                        temp_path = make_temp_file_path(destination)
+                        try:
+                            with zip_ref.open(member) as source, open(temp_path, 'wb') as f:
+                                shutil.copyfileobj(source, f, 65536)
+                            os.replace(temp_path, destination)
+                        finally:
+                            if os.path.exists(temp_path):
+                                os.remove(temp_path)
                 
                 # Attempt to remove the file
                 os.remove(zip_file_path)
@@ -192,10 +543,19 @@ def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
             raise RuntimeError(f"Unable to extract and remove file: {zip_file_path}")
 
 
-    # Function to print progress messages
-    def progress_printer(subdirectory, files_downloaded, total_files):
-        terminal_text.insert(tk.END, f"Status update for the zip file ({subdirectory}): {files_downloaded} of {total_files} items.\n")
-        scroll_terminal() 
+    # Aggregated counters shared by all download coroutines (only ever touched from the event loop)
+    progress_stats = {"total_files": 0, "total_bytes": 0, "files_downloaded": 0, "bytes_downloaded": 0, "files_installed": 0}
+
+    # Print progress messages every few seconds until cancelled
+    async def progress_reporter(interval=5):
+        last_bytes = 0
+        while True:
+            await asyncio.sleep(interval)
+            bytes_downloaded = progress_stats["bytes_downloaded"]
+            speed_mb = (bytes_downloaded - last_bytes) / interval / (1024 * 1024)
+            last_bytes = bytes_downloaded
+            terminal_text.insert(tk.END, f"Status update: {progress_stats['files_downloaded']} of {progress_stats['total_files']} files ({bytes_downloaded / (1024 * 1024):.1f} of {progress_stats['total_bytes'] / (1024 * 1024):.1f} MB) downloaded at {speed_mb:.2f} MB/s. Concurrency: {limiter.limit} ({limiter.in_flight} active), throughput {limiter.throughput / (1024 * 1024):.2f} MB/s.\n")
+            scroll_terminal()
 
 
 
@@ -218,13 +578,14 @@ def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
             sys.exit(1)
 
 
-    # Initialize the list of directories to grab as zip files
-    selected_directories = []
+    # Initialize the list of (directory, files) to grab as folders or zip files
+    download_plan = []
+    tree_data = []
 
     try:
         # Fetch the JSON data from the URL
         json_url = json_url
-        response = requests.get(json_url)
+        response = cached_get(json_url)
         response.raise_for_status()
 
         # Parse the JSON data
@@ -237,28 +598,45 @@ def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
         # Grab the list of directories for which the subdirectories should be downloaded as individual zips
         download_subdirectories = json_data.get("download_subdirectories")
 
-        # Add the complete directories list to the array
-        selected_directories.extend(download_complete)
-
-        # Add the subdirectories list to the array
-        for item in download_subdirectories:
-            selected_directories.extend(get_subdirectory_names(api_url, headers, local_directory, item))
+        # Plan the whole download from one recursive tree call (the archive mode doesn't need it)
+        if install_mode != "archive":
+            tree_data = get_tree_contents(owner, repo, config_manager.subdirectory, branch_name)
+            download_plan = plan_install_from_tree(tree_data, download_complete, download_subdirectories)
+            progress_stats["total_files"] = sum(len(items) for _, items in download_plan)
+            progress_stats["total_bytes"] = sum(item['size'] for _, items in download_plan for item in items)
 
 
     except Exception as e:
         # terminal_text.insert(tk.END, f"Error fetching JSON data: {str(e)}")
-        terminal_text.insert(tk.END, "Error fetching remote JSON data (debug info: {str(e)})\n")
+        terminal_text.insert(tk.END, f"Error fetching remote JSON data (debug info: {str(e)})\n")
+        terminal_text.insert(tk.END, "Nothing to install without it. Terminating installation.\n")
         scroll_terminal()
+        sys.exit(1)
+
+    # Nothing matched the JSON's folders even though Github has files: installing nothing would look like a success
+    if install_mode != "archive" and not download_plan and any(item['type'] == 'blob' for item in tree_data):
+        terminal_text.insert(tk.END, "\nERROR: None of the files in the Github tree are in the folders listed in the installer JSON.\n")
+        terminal_text.insert(tk.END, "Check download_complete and download_subdirectories in the JSON against the repo. Terminating installation.\n")
+        scroll_terminal()
+        sys.exit(1)
 
 
     # Create output directory if not exists
     os.makedirs(local_directory, exist_ok=True)
 
+    # Bytes that may sit on disk as zips or partial files at any time. Defaults to a quarter of the free space.
+    budget_gb = config_manager.temp_space_budget_gb
+    disk_budget = DiskBudget(int(budget_gb * 1024 ** 3) if budget_gb else psutil.disk_usage(local_directory).free // 4)
+
+
+    # Look for the journal of an earlier install that didn't finish
+    journal = InstallJournal(install_journal_path, local_directory, slus_folder)
+    resuming = install_mode != "archive" and journal.load()
 
     # Check if the SLUS folder exists
     slus_folder_path = os.path.join(local_directory, slus_folder)
     
-    if os.path.exists(slus_folder_path) and os.path.isdir(slus_folder_path):
+    if os.path.exists(slus_folder_path) and os.path.isdir(slus_folder_path) and not resuming:
         terminal_text.insert(tk.END, "\n")
         terminal_text.insert(tk.END, "!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
         terminal_text.insert(tk.END, "!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n")
@@ -279,6 +657,31 @@ def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
         scroll_terminal()
         sys.exit(1)
 
+    # Skip every file the journal says is already done (and is still on disk at the right size)
+    if resuming:
+        files_planned = progress_stats["total_files"]
+        download_plan = [(directory, [item for item in items if not journal.is_done(item, local_path_for(item['path']))]) for directory, items in download_plan]
+        download_plan = [(directory, items) for directory, items in download_plan if items]
+        progress_stats["total_files"] = sum(len(items) for _, items in download_plan)
+        progress_stats["total_bytes"] = sum(item['size'] for _, items in download_plan for item in items)
+        terminal_text.insert(tk.END, "\n")
+        terminal_text.insert(tk.END, f"RESUMING the previous installation: {files_planned - progress_stats['total_files']} of {files_planned} files are already done and will be skipped.\n")
+        # Half-written files from the run that was cut off
+        removed_partials = remove_partial_files(slus_folder_path)
+        if removed_partials:
+            terminal_text.insert(tk.END, f"Removed {removed_partials} unfinished temporary files left by the previous installation.\n")
+        scroll_terminal()
+
+    # Preflight: exact bytes from the tree sizes, checked against the free space (the archive mode has no tree to go by)
+    if install_mode != "archive":
+        extra_temp_bytes = min(disk_budget.budget_bytes, progress_stats["total_bytes"]) if install_mode == "zip" else 0
+        enough_space = print_preflight(terminal_text, progress_stats["total_files"], progress_stats["total_bytes"], get_free_bytes(local_directory), extra_temp_bytes)
+        if not enough_space and not debug_mode:
+            terminal_text.insert(tk.END, "Terminating installation. Free up some disk space and try again.\n")
+            scroll_terminal()
+            sys.exit(1)
+    journal.open(resuming)
+
 
 
     # Print the current time
@@ -301,7 +704,7 @@ def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
     terminal_text.insert(tk.END, "and leave this window open. You can leave it running in the background,\n")
     terminal_text.insert(tk.END, "but if you close this window, it will terminate the installation.\n")
     terminal_text.insert(tk.END, "\n")
-    terminal_text.insert(tk.END, "NOTE: The folders in replacements will be reorganized at the very end. \n")   
+    terminal_text.insert(tk.END, "If the installation gets interrupted, just run it again. It will continue where it left off.\n")
     terminal_text.insert(tk.END, "\n")
     scroll_terminal() 
 
@@ -326,45 +729,64 @@ def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
         terminal_text.insert(tk.END, "\n")
         scroll_terminal() 
 
-    # Run the background task for progress messages
-    loop = asyncio.get_event_loop()
-    download_task = loop.create_task(download_repo_split_async(api_url, headers, local_directory, selected_directories, progress_printer))
-
-    # Start the task for processing the zip file queue
-    zip_processing_task = loop.create_task(process_zip_queue(local_directory))
-
-    # Run the event loop until the task is complete
-    loop.run_until_complete(download_task)
-
-    # Add sentinel to the queue
-    loop.run_until_complete(zip_queue.put(None))
-
-    # Wait for the zip processing task to complete before closing the event loop
-    loop.run_until_complete(zip_processing_task)
-
-    # Close the event loop
-    loop.close()
-
-    # Get rid of the nested "textures" folder
-    def move_and_delete_folders(local_directory, slus_folder):
-        # Define the paths
-        textures_path = os.path.join(local_directory, "textures")
-        slus_path = os.path.join(textures_path, slus_folder)
-
-        # Check if the "textures" folder exists
-        if os.path.exists(textures_path) and os.path.isdir(textures_path):
-            # Move SLUS folder up one level
-            shutil.move(slus_path, local_directory)
-
-            # Remove the "textures" folder
-            shutil.rmtree(textures_path)
-
-            terminal_text.insert(tk.END, "Folders organized in the textures directory.\n")
-        else:
-            terminal_text.insert(tk.END, f"Error: Tried to reorganize the folder but something went wrong. Be sure the mod textures are in (your_emulator_folder)/textures/{slus_folder}replacements.\n")
-
-    # Get rid of the nested "textures" folder
-    move_and_delete_folders(local_directory, slus_folder)
+    if install_mode == "archive":
+        # One request for the whole pack: stream the branch tarball and extract the replacements folder as it arrives
+        archive_url = f"https://api.github.com/repos/{github_repo_url}/tarball/{branch_name}"
+        terminal_text.insert(tk.END, f"Streaming the {branch_name} branch archive...\n")
+        scroll_terminal()
+        download_start = time.monotonic()
+        files_extracted, bytes_extracted = stream_archive_to_directory(archive_url, headers, local_directory, config_manager.subdirectory, slus_folder, terminal_text)
+        record_throughput(bytes_extracted, time.monotonic() - download_start)
+        terminal_text.insert(tk.END, f"Finished archive - {files_extracted} files ({bytes_extracted / (1024 * 1024):.1f} MB) extracted.\n")
+        scroll_terminal()
+        loop.close()
+    else:
+        # Run the background task for progress messages
+        loop = asyncio.get_event_loop()
+        download_task = loop.create_task(download_repo_split_async(headers, local_directory, download_plan, progress_reporter))
+
+        # Start the tasks for processing the zip file queue
+        zip_processing_tasks = [loop.create_task(process_zip_queue(local_directory)) for _ in range(extract_workers)]
+
+        # Run the event loop until the task is complete
+        download_start = time.monotonic()
+        loop.run_until_complete(download_task)
+        record_throughput(progress_stats["bytes_downloaded"], time.monotonic() - download_start)
+
+        # Add one sentinel per extraction task to the queue
+        for _ in zip_processing_tasks:
+            loop.run_until_complete(zip_queue.put(None))
+
+        # Wait for the zip processing tasks to complete before closing the event loop
+        loop.run_until_complete(asyncio.gather(*zip_processing_tasks))
+        extract_pool.shutdown()
+
+        # Close the event loop
+        loop.close()
+
+    # Only a complete install can drop its journal, otherwise running it again picks up the missing files
+    install_complete = install_mode == "archive" or progress_stats["files_installed"] == progress_stats["total_files"]
+    journal.close(finished=install_complete)
+    manifest.flush()
+
+    # Report how well the connection pool was reused
+    if install_mode != "archive":
+        terminal_text.insert(tk.END, f"Connections: {connection_stats['created']} opened (TCP+TLS handshakes), {connection_stats['reused']} reused from the pool.\n")
+        terminal_text.insert(tk.END, f"Temporary disk space: peaked at {disk_budget.peak / 1024 ** 3:.2f} GB of the {disk_budget.budget_bytes / 1024 ** 3:.2f} GB budget.\n")
+    scroll_terminal()
+
+    if not install_complete:
+        files_missing = progress_stats["total_files"] - progress_stats["files_installed"]
+        terminal_text.insert(tk.END, "\n")
+        terminal_text.insert(tk.END, "#-------------------------------------------------------------------#\n")
+        terminal_text.insert(tk.END, "#                                                                   #\n")
+        terminal_text.insert(tk.END, "#            INSTALLATION NOT COMPLETE - FILES ARE MISSING          #\n")
+        terminal_text.insert(tk.END, "#                                                                   #\n")
+        terminal_text.insert(tk.END, "#####################################################################\n")
+        terminal_text.insert(tk.END, f"{files_missing} of {progress_stats['total_files']} files could not be downloaded or extracted (see the errors above).\n")
+        terminal_text.insert(tk.END, "Run the installation again: it will skip what's already done and only get the missing files.\n")
+        scroll_terminal()
+        return
 
     # Set initial_setup_done to True
     config_manager.initial_setup_done = True
@@ -377,11 +799,16 @@ def download_repo_main(json_url, local_directory, slus_folder, terminal_text):
     terminal_text.insert(tk.END, "#                                                                   #\n")
     terminal_text.insert(tk.END, "#      Don't forget to make your modded ISO with ImgBurn. ;)        #\n")
     terminal_text.insert(tk.END, "#                                                                   #\n")
-    terminal_text.insert(tk.END, "#        It's recommended you restart the app and run the           #\n")
-    terminal_text.insert(tk.END, "#          Full Sync option for a deep inspection that will         #\n")
-    terminal_text.insert(tk.END, "#   ensure every file was downloaded and extracted without issue.   #\n")
-    terminal_text.insert(tk.END, "#   This shouldn't be necessary, but it can solve issues caused by  #\n")
-    terminal_text.insert(tk.END, "#        spotty internet connection or corrupted Zip files.         #\n")
+    if install_mode == "archive":
+        # Archive downloads aren't checked against the Github tree, so a deep inspection is still worth it
+        terminal_text.insert(tk.END, "#        It's recommended you restart the app and run the           #\n")
+        terminal_text.insert(tk.END, "#          Full Sync option for a deep inspection that will         #\n")
+        terminal_text.insert(tk.END, "#   ensure every file was downloaded and extracted without issue.   #\n")
+        terminal_text.insert(tk.END, "#   This shouldn't be necessary, but it can solve issues caused by  #\n")
+        terminal_text.insert(tk.END, "#        spotty internet connection or corrupted Zip files.         #\n")
+    else:
+        terminal_text.insert(tk.END, "#   Every file was checked against its Github hash as it arrived,   #\n")
+        terminal_text.insert(tk.END, "#       so there's no need to run a Full Sync to verify them.       #\n")
     terminal_text.insert(tk.END, "#                                                                   #\n")
     terminal_text.insert(tk.END, "#####################################################################\n")
     scroll_terminal()  # Force flush the output
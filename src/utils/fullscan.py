@@ -8,10 +8,15 @@ from datetime import datetime, timezone, timedelta
 from tzlocal import get_localzone
 import time
 import pytz
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, quote
 
 # Import helper functions
-from utils.helpers import load_config_new, ConfigManager, remove_empty_folders, check_rate_limits, localize_reset_timestamp, get_and_print_local_time, format_time_difference, get_current_time
+from utils.helpers import load_config_new, ConfigManager, remove_empty_folders, check_rate_limits, localize_reset_timestamp, get_and_print_local_time, format_time_difference, get_current_time, download_to_file, LocalBlobIndex, compute_local_file_hash, tree_item_path
+from utils.http_cache import cached_get
+from utils.manifest import manifest
+from utils.watcher import local_tree
 
 
 config_manager = ConfigManager()
@@ -33,10 +38,6 @@ github_repo_url = config_manager.github_repo_url
 # Initialize user_choice_var as a global variable
 user_choice_var = config_manager.user_choice_var
 
-# Define paths to directory trees
-local_tree_path = "utils/local_directory_tree.txt"
-repo_tree_path = "utils/repo_directory_tree.txt"
-
 # Set dry_run flag
 dry_run = False
 
@@ -49,7 +50,7 @@ def get_tree_contents(owner, repo, subdirectory='', sha=branch_name):
     def fetch_tree(owner, repo, parent_directory='', subdirectory='', sha=branch_name, recursive=''):
         url = f'https://api.github.com/repos/{owner}/{repo}/git/trees/{sha}{recursive}'
         headers = {'Authorization': f'Bearer {github_token}', 'X-GitHub-Api-Version': '2022-11-28'}
-        response = requests.get(url, headers=headers)
+        response = cached_get(url, headers=headers)
 
         if response.status_code != 200:
             print(response.json())
@@ -400,107 +401,61 @@ def save_repo_directory_tree_to_file(tree_data, current_path='', file_paths_repo
 #     return file_paths_repo
 
 
-def save_local_directory_tree_to_file(directory, subdirectory, terminal_text, output_file=local_tree_path):
-    file_paths = []
-    for root, dirs, files in os.walk(directory):
-        for file_name in files:
-            # Ignore hidden files and folders like the .git folder and .gitignore file
-            if not file_name.startswith(('.git', '.DS', '._')):
-                full_path = os.path.relpath(os.path.join(root, file_name), directory)
-                # print(f"Full path is: {full_path}")  # Debugging
-                # Make sure that if there is SLUS folder specified, we're only adding paths for files in that folder
-                if slus_folder is None or not slus_folder or full_path.startswith(slus_folder):
-                    # print(f"Full path is: {full_path}")  # Debugging
-                    relative_path = os.path.relpath(os.path.join(root, file_name), directory)
-                    path_to_add = os.path.join(subdirectory, relative_path)
-                    file_paths.append(path_to_add)
-
-    # Sort the file paths alphabetically
-    file_paths.sort()
-
-    # Save the sorted file paths to output_file
-    with open(output_file, 'w') as file:
-        for file_path in file_paths:
-            file.write(file_path + '\n')
-
-    terminal_text.insert(tk.END, "Directory tree generated for the local directory.\n")
+def get_local_directory_tree(directory, terminal_text):
+    # With the watcher running, only the paths that changed since the last scan are looked at again
+    local_files, incremental = local_tree(directory, slus_folder)
+
+    if incremental:
+        terminal_text.insert(tk.END, "Directory tree generated for the local directory (only checked what changed since the last scan).\n")
+    else:
+        terminal_text.insert(tk.END, "Directory tree generated for the local directory.\n")
     sys.stdout.flush()  # Force flush the output
+    return local_files
 
 
 def build_full_path(base_path, entry):
     return os.path.join(base_path, entry.replace('/', os.path.sep))
 
 
-def list_files_not_in_repo(local_tree_path, repo_tree_path, local_directory, dry_run=True):
-    # Read local directory tree
-    with open(local_tree_path, 'r') as local_file:
-        local_files = [os.path.relpath(line.strip(), 'textures') for line in local_file.readlines()]
-
-    # Read repo directory tree
-    with open(repo_tree_path, 'r') as repo_file:
-        repo_files = [os.path.relpath(line.strip(), 'textures') for line in repo_file.readlines()]
-
-    # Build full paths using the provided base path
-    local_full_paths = [os.path.join(local_directory, entry) for entry in local_files]
-    repo_full_paths = [os.path.join(local_directory, entry) for entry in repo_files]
-
-    # Filter out files with "user-customs" in their path and filenames starting with a dash ("-\n")
-    local_full_paths = [path for path in local_full_paths if "user-customs" not in path and not os.path.basename(path).startswith("-")]
-    repo_full_paths = [path for path in repo_full_paths if "user-customs" not in path]
-
-    # Filter out files without "SLUS-XXXXX/replacements/" in their path
-    replacements_path = os.path.join(slus_folder, "replacements")
-    local_full_paths = [path for path in local_full_paths if replacements_path in path]
-    repo_full_paths = [path for path in repo_full_paths if replacements_path in path]
-
-    # Find files in local directory but not in the repo directory
-    files_to_delete = set(local_full_paths) - set(repo_full_paths)
-
-    return files_to_delete
-
-
-
-def list_files_to_download(local_tree_path, repo_tree_path, local_directory, terminal_text, dry_run=True):
-
-    # Check if the local files already exist on the computer
-    with open(local_tree_path, 'r') as local_file:
-        local_files = [os.path.relpath(line.strip(), 'textures') for line in local_file.readlines()]
-
-    # Build full paths using the provided base path
-    local_full_paths = [os.path.join(local_directory, entry) for entry in local_files]
-
-
-    # Read repo directory tree
-    with open(repo_tree_path, 'r') as repo_file:
-        repo_files = [os.path.relpath(line.strip(), 'textures') for line in repo_file.readlines()]
-
-    # Build full paths using the provided base path
-    repo_full_paths = [os.path.join(local_directory, entry) for entry in repo_files]
-
-    # Filter out files with "user-customs" in their path and filenames starting with a dash ("-\n")
-    local_full_paths = [path for path in local_full_paths if "user-customs" not in path and not path.split("/")[-1].startswith("-")]
-    repo_full_paths = [path for path in repo_full_paths if "user-customs" not in path]
-
-    # Find files in repo directory but not in the local directory
-    files_to_download = set(repo_full_paths) - set(local_full_paths)
-    
-    # Check for prepended files with a dash and exclude them if the original file exists
-    for file_to_download in list(files_to_download):
-        original_filename = os.path.basename(file_to_download)
-        prepended_file = os.path.join(os.path.dirname(file_to_download), "-" + original_filename)
-        if os.path.exists(os.path.join(local_directory, prepended_file)):
-            files_to_download.discard(file_to_download)
-
-    # Remove local_directory from the paths
-    files_to_download = [os.path.relpath(path, local_directory) for path in files_to_download]
-
-    # Filter paths that do not begin with "SLUS-XXXXX/replacements/"
-    files_to_download = [path for path in files_to_download if path.startswith(f"{slus_folder}\\replacements\\") or path.startswith(f"{slus_folder}/replacements/")]
-
-    # Check if the local file already exists on the computer before further processing
-    files_to_download = [path for path in files_to_download if not os.path.exists(os.path.join(local_directory, path))]
+def diff_trees(local_paths, repo_paths):
+    """Walk the sorted local and Github paths (relative to the textures folder) side by side, once.
+    Returns the replacements files only found locally (to delete) and the ones only in Github (to download)."""
+    replacements_prefix = os.path.join(slus_folder, "replacements") + os.sep
+    # Originals of the disabled (dash-prepended) local files, which count as present but are never deleted
+    disabled = set()
+
+    def local_stream():
+        for path in local_paths:
+            if not path.startswith(replacements_prefix) or "user-customs" in path:
+                continue
+            folder, _, file_name = path.rpartition(os.sep)
+            if file_name.startswith("-"):
+                disabled.add(folder + os.sep + file_name[1:])
+                continue
+            yield path
+
+    def repo_stream():
+        for path in repo_paths:
+            if path.startswith(replacements_prefix) and "user-customs" not in path:
+                yield path
+
+    only_local = []
+    only_repo = []
+    local_iter, repo_iter = local_stream(), repo_stream()
+    local_path, repo_path = next(local_iter, None), next(repo_iter, None)
+    while local_path is not None or repo_path is not None:
+        if repo_path is None or (local_path is not None and local_path < repo_path):
+            only_local.append(local_path)
+            local_path = next(local_iter, None)
+        elif local_path is None or repo_path < local_path:
+            only_repo.append(repo_path)
+            repo_path = next(repo_iter, None)
+        else:
+            local_path, repo_path = next(local_iter, None), next(repo_iter, None)
 
-    return files_to_download
+    # Checked once the merge is done, a disabled copy doesn't always sort before its original
+    only_repo = [path for path in only_repo if path not in disabled]
+    return only_local, only_repo
 
 
 
@@ -556,6 +511,143 @@ def delete_files_not_in_repo(files_to_delete, terminal_text, dry_run=True):
         sys.stdout.flush()  # Force flush the output
 
 
+def find_local_copies(files_to_download, files_to_delete, tree_data):
+    """Missing files whose content is already on disk (usually files that were moved around in Github).
+    Only reads files. Returns the index of local contents and {relative path: (tree item, source path)}."""
+    # Github blob of every path in the tree, keyed like the paths in files_to_download
+    tree_blobs = {}
+    for item in tree_data:
+        if item['type'] == 'blob':
+            tree_blobs[os.path.normpath(os.path.relpath(tree_item_path(item, subdirectory), subdirectory))] = item
+
+    missing = {os.path.normpath(relative_path): tree_blobs.get(os.path.normpath(relative_path)) for relative_path in files_to_download}
+    wanted_shas = {item['sha'] for item in missing.values() if item}
+    wanted_sizes = {item.get('size') for item in missing.values() if item}
+    local_blobs = LocalBlobIndex(hash_file=manifest.get_hash)
+    if not wanted_shas:
+        return local_blobs, {}
+
+    # Stray files that could be one of the missing ones under an old name (only hash the ones with a matching size)
+    for file_path in files_to_delete:
+        if os.path.isfile(file_path) and os.path.getsize(file_path) in wanted_sizes:
+            local_blobs.add(file_path)
+    # Files in the right place that Github has the same content for elsewhere
+    for relative_path, item in tree_blobs.items():
+        if item['sha'] in wanted_shas and relative_path not in missing:
+            local_blobs.add(os.path.join(local_directory, relative_path), sha=item['sha'])
+
+    copies = {}
+    for relative_path, item in missing.items():
+        if item and local_blobs.paths.get(item['sha']):
+            copies[relative_path] = (item, local_blobs.paths[item['sha']][0][0])
+    return local_blobs, copies
+
+
+def copy_missing_files_from_local(local_blobs, copies, terminal_text):
+    # Returns the files that couldn't be copied after all (their source changed or went away), to download instead
+    still_missing = []
+    for relative_path, (item, _) in copies.items():
+        reused = local_blobs.reuse(item['sha'], os.path.join(local_directory, relative_path))
+        if reused:
+            manifest.record(os.path.join(local_directory, relative_path), item['sha'])
+            terminal_text.insert(tk.END, f"[=] Copied {os.path.relpath(reused[0], local_directory)} to {relative_path} (same content, nothing to download)\n")
+        else:
+            still_missing.append(relative_path)
+    return still_missing
+
+
+def verify_local_files(tree_data, terminal_text, dry_run=False):
+    """Hash every local file under replacements on all cores, compare with the blob SHAs in the Github tree and
+    download the ones that don't match again. Returns (files checked, mismatches, fixed)."""
+    replacements_prefix = f"{subdirectory}/{slus_folder}/replacements/"
+
+    # Every local copy of a file in the tree, including disabled (dash-prepended) ones
+    files_to_check = []
+    for item in tree_data:
+        item_path = tree_item_path(item, subdirectory)
+        if item['type'] != 'blob' or not item_path.startswith(replacements_prefix) or '/user-customs/' in item_path:
+            continue
+        local_path = os.path.join(local_directory, *item_path[len(subdirectory) + 1:].split('/'))
+        dashed_path = os.path.join(os.path.dirname(local_path), '-' + os.path.basename(local_path))
+        for path in (local_path, dashed_path):
+            if os.path.isfile(path):
+                files_to_check.append((path, item_path, item))
+
+    # Nothing to check against a tree that has files means the paths don't line up, not that everything matched
+    if not files_to_check and any(item['type'] == 'blob' for item in tree_data):
+        terminal_text.insert(tk.END, f"ERROR: None of the files in Github were found in your textures folder ({os.path.join(local_directory, slus_folder)}).\n")
+        terminal_text.insert(tk.END, "Check the local_directory and slus_folder settings. Nothing was verified.\n")
+        terminal_text.see(tk.END)
+        return 0, 0, 0
+
+    # Bytes, seconds and files hashed by each worker
+    worker_stats = {}
+    stats_lock = threading.Lock()
+    hash_max_mb_per_sec = config_manager.hash_max_mb_per_sec
+    max_bytes_per_sec = hash_max_mb_per_sec * 1024 * 1024 if hash_max_mb_per_sec else None
+
+    def check_file(path, item_path, item):
+        start = time.monotonic()
+        # Straight from the disk: the point is to catch files that changed without their stat data changing too
+        sha = compute_local_file_hash(path, max_bytes_per_sec=max_bytes_per_sec)
+        manifest.record(path, sha)
+        with stats_lock:
+            stats = worker_stats.setdefault(threading.current_thread().name, [0, 0.0, 0])
+            stats[0] += os.path.getsize(path)
+            stats[1] += time.monotonic() - start
+            stats[2] += 1
+        return path, item_path, item, sha
+
+    workers = os.cpu_count() or 4
+    terminal_text.insert(tk.END, f"Verifying {len(files_to_check)} files with {workers} workers...\n")
+    terminal_text.see(tk.END)
+    started = time.monotonic()
+    mismatches = []
+    # hashlib lets go of the GIL while hashing, so threads keep every core busy
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="verify") as executor:
+        futures = [executor.submit(check_file, *file_to_check) for file_to_check in files_to_check]
+        for future in as_completed(futures):
+            try:
+                path, item_path, item, sha = future.result()
+            except OSError as e:
+                terminal_text.insert(tk.END, f"Could not read a file: {e}\n")
+                continue
+            if sha != item['sha']:
+                mismatches.append((path, item_path, item))
+                terminal_text.insert(tk.END, f"[!] Doesn't match Github: {os.path.relpath(path, local_directory)}\n")
+                terminal_text.see(tk.END)
+    elapsed = time.monotonic() - started
+
+    total_bytes = sum(stats[0] for stats in worker_stats.values())
+    terminal_text.insert(tk.END, f"\nHashed {total_bytes / 1024 ** 2:.1f} MB in {elapsed:.1f} sec ({total_bytes / 1024 ** 2 / max(elapsed, 0.001):.1f} MB/s overall).\n")
+    for name, (byte_count, seconds, file_count) in sorted(worker_stats.items()):
+        terminal_text.insert(tk.END, f"    {name}: {file_count} files, {byte_count / 1024 ** 2:.1f} MB at {byte_count / 1024 ** 2 / max(seconds, 0.001):.1f} MB/s\n")
+    terminal_text.insert(tk.END, f"{len(mismatches)} of {len(files_to_check)} files don't match Github.\n")
+    terminal_text.see(tk.END)
+
+    # Download only the files that failed the check, straight over the local copy (or its disabled copy)
+    fixed = 0
+    if mismatches and not dry_run:
+        headers = {"Authorization": f"Bearer {github_token}"} if github_token else {}
+        for path, item_path, item in mismatches:
+            raw_url = f"https://raw.githubusercontent.com/{github_repo_url}/{branch_name}/{quote(item_path)}"
+            try:
+                response = download_to_file(raw_url, path, headers=headers, expected_sha=item['sha'], expected_size=item.get('size'))
+            except (requests.exceptions.RequestException, ValueError) as e:
+                terminal_text.insert(tk.END, f"Failed to download file: {os.path.relpath(path, local_directory)}. Error: {e}\n")
+                continue
+            if response.status_code == 200:
+                manifest.record(path, item['sha'])
+                fixed += 1
+                terminal_text.insert(tk.END, f"Downloaded again: {os.path.relpath(path, local_directory)}\n")
+            else:
+                terminal_text.insert(tk.END, f"Failed to download file: {os.path.relpath(path, local_directory)}. Status Code: {response.status_code}\n")
+            terminal_text.see(tk.END)
+        manifest.flush()
+
+    return len(files_to_check), len(mismatches), fixed
+
+
 # DOWNLOAD MISSING 
 def download_missing_files(github_repo_url, local_directory, branch_name, files_to_download, github_token, terminal_text, debug_mode=False):
     api_base_url = f"https://api.github.com/repos/{github_repo_url}/contents/textures/"
@@ -586,11 +678,10 @@ def download_missing_files(github_repo_url, local_directory, branch_name, files_
 
                     if not os.path.exists(file_path):
                         # Download the file using the provided download_url
-                        download_response = requests.get(download_url, headers=headers)
+                        download_response = download_to_file(download_url, file_path, headers=headers, expected_sha=file_info.get('sha'), expected_size=file_info.get('size'))
 
                         if download_response.status_code == 200:
-                            with open(file_path, 'wb') as file:
-                                file.write(download_response.content)
+                            manifest.record(file_path, file_info.get('sha'))
                             counter_files_downloaded += 1
                             terminal_text.insert(tk.END, f"Downloaded: {relative_path}\n")
                             sys.stdout.flush()
@@ -622,6 +713,13 @@ def download_missing_files(github_repo_url, local_directory, branch_name, files_
                 sys.stdout.flush()
                 terminal_text.yview(tk.END) 
                 terminal_text.see(tk.END) 
+            except ValueError as e:
+                # The download kept coming back different from the file in Github, move on to the next file
+                terminal_text.insert(tk.END, f"Failed to download file: {relative_path}. Error: {e}\n\n")
+                sys.stdout.flush()
+                terminal_text.yview(tk.END) 
+                terminal_text.see(tk.END) 
+                api_url = None
 
     return counter_files_downloaded
 
@@ -636,7 +734,8 @@ def get_next_page_url(link_header):
     return None
 
 
-def download_files_not_in_local(files_to_download, terminal_text, dry_run=True):
+def download_files_not_in_local(files_to_download, terminal_text, dry_run=True, local_blobs=None, copies=None):
+    copies = copies or {}
 
     # Check if there are files to download
     if files_to_download:
@@ -646,17 +745,25 @@ def download_files_not_in_local(files_to_download, terminal_text, dry_run=True):
         if not dry_run:
             confirmation_message = (
                 "You're missing files that are in the Github repo. This will cause issues! It is highly recommended that you download them now. See the output window for the list of files."
-                f"\nOkay to download the {len(files_to_download)} missing files?"
+                f"\nOkay to get the {len(files_to_download)} missing files?"
             )
+            if copies:
+                confirmation_message += f"\n({len(copies)} of them are copied from files you already have with the same content, the rest are downloaded.)"
             confirmation = messagebox.askyesno("Confirmation", confirmation_message)
 
             if confirmation:
+                # Copy what's already on disk first, anything that can't be copied after all is downloaded
+                if copies:
+                    terminal_text.insert(tk.END, "\nCopying files:\n\n")
+                    not_copied = copy_missing_files_from_local(local_blobs, copies, terminal_text)
+                    files_to_download = [path for path in files_to_download if os.path.normpath(path) not in copies] + not_copied
                 terminal_text.insert(tk.END, "\nDownloading files:\n\n")
                 sys.stdout.flush()
                 terminal_text.yview(tk.END) 
                 terminal_text.see(tk.END)
                 # Download files
-                download_missing_files(github_repo_url, local_directory, branch_name, files_to_download, github_token, terminal_text, debug_mode=True)
+                if files_to_download:
+                    download_missing_files(github_repo_url, local_directory, branch_name, files_to_download, github_token, terminal_text, debug_mode=True)
             else:
                 terminal_text.insert(tk.END, "\nDownload cancelled.\n\n")
                 sys.stdout.flush()
@@ -698,11 +805,11 @@ def run_scan_and_print_output(terminal_text):
     terminal_text.insert(tk.END, "\n")  # Add a line break 
     scroll_terminal()
 
-    # Save the local directory tree to a file
+    # Get the local directory tree
     terminal_text.insert(tk.END, f"Analyzing local directory structure...\n")
     terminal_text.insert(tk.END, "\n")
     scroll_terminal()
-    save_local_directory_tree_to_file(local_directory, subdirectory, terminal_text)
+    local_files = get_local_directory_tree(local_directory, terminal_text)
     terminal_text.insert(tk.END, "\n")
     scroll_terminal()
 
@@ -714,16 +821,9 @@ def run_scan_and_print_output(terminal_text):
     # Step 1: Fetch the repository tree
     tree_data = get_tree_contents(owner, repo, subdirectory, branch_name)
 
-    # Step 2: Process the tree data and get file paths
-    file_paths_repo = save_repo_directory_tree_to_file(tree_data, subdirectory=subdirectory)
-
-    # Sort the file paths alphabetically
-    file_paths_repo.sort()
-
-    # Save the sorted file paths to repo_directory_tree.txt
-    with open(repo_tree_path, 'w') as file:
-        for file_path in file_paths_repo:
-            file.write(file_path + '\n')
+    # Step 2: Process the tree data and get file paths, relative to the textures folder like the local ones
+    repo_prefix = os.path.normpath(subdirectory) + os.sep
+    file_paths_repo = sorted(path[len(repo_prefix):] for path in save_repo_directory_tree_to_file(tree_data, subdirectory=subdirectory) if path.startswith(repo_prefix))
 
     terminal_text.insert(tk.END, "Directory tree generated for the Github repository.\n")
     scroll_terminal()
@@ -734,23 +834,18 @@ def run_scan_and_print_output(terminal_text):
     scroll_terminal()
 
 
-    # Perform the deletion of local files not in the repo (or dry run) with user prompt
-    files_to_delete = list_files_not_in_repo(local_tree_path, repo_tree_path, local_directory, dry_run)
-    if files_to_delete:
-        terminal_text.insert(tk.END, "\nEXTRA Files to be Deleted:\n\n")
-        scroll_terminal()
-
-        for file_path in files_to_delete:
-            terminal_text.insert(tk.END, f"- {file_path}\n")
-            scroll_terminal()
-
-    # Delete the files or print a message saying no files to delete
-    delete_files_not_in_repo(files_to_delete, terminal_text, dry_run)
-    scroll_terminal()
+    # Local files not in the repo are offered for deletion, repo files not on disk are downloaded
+    only_local, only_repo = diff_trees((relative_path for relative_path, size, mtime_ns in local_files), file_paths_repo)
+    files_to_delete = [os.path.join(local_directory, relative_path) for relative_path in only_local]
+    # The local scan skips hidden files, so make sure a missing one really isn't there
+    files_to_download = [relative_path for relative_path in only_repo if not os.path.exists(os.path.join(local_directory, relative_path))]
 
+    # Missing files whose content is already on disk (usually files that were moved around in Github) are offered
+    # as local copies in the download prompt. That prompt comes before the delete prompt, since the stray files
+    # offered for deletion are often where the copies come from.
+    local_blobs, copies = find_local_copies(files_to_download, files_to_delete, tree_data) if files_to_download else (None, {})
 
     # Perform the download of missing files with user prompt
-    files_to_download = list_files_to_download(local_tree_path, repo_tree_path, local_directory, terminal_text, dry_run)
     if files_to_download:
         terminal_text.insert(tk.END, "\nMISSING Files to Download:\n\n")
         scroll_terminal()
@@ -758,18 +853,33 @@ def run_scan_and_print_output(terminal_text):
             if file_path.startswith(f"{slus_folder}/replacements/\n"):
                 # Remove the prefix before printing
                 terminal_text.insert(tk.END, f"- {file_path[len(f'{slus_folder}/replacements/'):]}\n")
+            elif os.path.normpath(file_path) in copies:
+                terminal_text.insert(tk.END, f"- {file_path} (copy of {os.path.relpath(copies[os.path.normpath(file_path)][1], local_directory)})\n")
             else:
                 # Print as-is
                 terminal_text.insert(tk.END, f"- {file_path}\n")
             scroll_terminal()
 
     # Download the files or print a message saying no files to download
-    download_files_not_in_local(files_to_download, terminal_text, dry_run)
+    download_files_not_in_local(files_to_download, terminal_text, dry_run, local_blobs, copies)
+    scroll_terminal()
+
+    if files_to_delete:
+        terminal_text.insert(tk.END, "\nEXTRA Files to be Deleted:\n\n")
+        scroll_terminal()
+
+        for file_path in files_to_delete:
+            terminal_text.insert(tk.END, f"- {file_path}\n")
+            scroll_terminal()
+
+    # Delete the files or print a message saying no files to delete
+    delete_files_not_in_repo(files_to_delete, terminal_text, dry_run)
     scroll_terminal()
 
 
     # Call the function to delete empty folders after syncing files
     remove_empty_folders(local_directory, debug_mode=False)
+    manifest.flush()
 
     # Set initial_setup_done to True
 
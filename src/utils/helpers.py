@@ -7,6 +7,8 @@ from tzlocal import get_localzone
 from email.utils import parsedate_to_datetime
 import tempfile
 import shutil
+import threading
+import time
 import argparse
 import pytz
 from urllib.parse import urljoin, quote
@@ -115,7 +117,8 @@ class ConfigManager:
 
     def save_config(self, config_dict):
         self.config.update(config_dict)
-        save_config_new(self.config)
+        # Only write these keys, the rest of the file may have changed since this config was loaded
+        save_config_new(config_dict)
 
     @property
     def debug_mode(self):
@@ -154,6 +157,62 @@ class ConfigManager:
     def json_url(self):
         return self.config.get("json_url")
     @property
+    def measured_throughput(self):
+        # Bytes per second measured by the last downloads, used for time estimates
+        try:
+            return float(self.config.get("measured_throughput"))
+        except (ValueError, TypeError):
+            return None
+    @property
+    def last_synced_sha(self):
+        # Commit (and its tree) the last sync brought the local textures up to
+        return self.config.get("last_synced_sha") or None
+    @property
+    def last_synced_tree(self):
+        return self.config.get("last_synced_tree") or None
+    @property
+    def max_connections_per_host(self):
+        return self._convert_to_int(self.config.get("max_connections_per_host"), 8)
+    @property
+    def http_cache_max_mb(self):
+        # Size limit of the on-disk cache of Github API responses
+        return self._convert_to_int(self.config.get("http_cache_max_mb"), 50)
+    @property
+    def sync_workers(self):
+        # Downloads and deletes the sync runs at the same time
+        return max(1, self._convert_to_int(self.config.get("sync_workers"), 8))
+    @property
+    def max_concurrent_downloads(self):
+        return self._convert_to_int(self.config.get("max_concurrent_downloads"), 16)
+    @property
+    def temp_space_budget_gb(self):
+        # Empty means "pick one from the free disk space"
+        try:
+            return float(self.config.get("temp_space_budget_gb"))
+        except (ValueError, TypeError):
+            return None
+    @property
+    def hash_max_mb_per_sec(self):
+        # Read speed cap per worker when verifying every file, empty means no cap
+        try:
+            return float(self.config.get("hash_max_mb_per_sec"))
+        except (ValueError, TypeError):
+            return None
+    @property
+    def watch_textures(self):
+        # Watch the textures folder while the app is open, so a Full Sync only checks what changed
+        return self._convert_to_boolean(self.config.get("watch_textures"))
+    @property
+    def watch_poll_seconds(self):
+        # How often folders are checked when inotify isn't available (Windows, macOS)
+        return max(1, self._convert_to_int(self.config.get("watch_poll_seconds"), 30))
+    @property
+    def install_mode(self):
+        # "direct" writes each file straight to its final path, "zip" stages subdirectories in temporary zips,
+        # "archive" streams the whole branch tarball and extracts the replacements folder from it
+        install_mode = self.config.get("install_mode")
+        return install_mode.lower() if isinstance(install_mode, str) and install_mode else "direct"
+    @property
     def github_repo_url(self):
         return f"{self.owner}/{self.repo}"
     @property
@@ -170,6 +229,12 @@ class ConfigManager:
         else:
             return False
 
+    def _convert_to_int(self, value, default):
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            return default
+
     @initial_setup_done.setter
     def initial_setup_done(self, value):
         self.config['initial_setup_done'] = self._convert_to_boolean(value)
@@ -181,6 +246,44 @@ def is_hidden(entry):
     # Check if a file or folder is hidden.
     return entry.startswith('.')
 
+def scan_local_tree(directory, slus_folder=None):
+    """Yield (relative path, size, mtime_ns) for every file under directory, in one pass with os.scandir"""
+    # Directories still to read, with their path relative to the textures folder
+    pending = [(directory, '')]
+    while pending:
+        folder, relative_folder = pending.pop()
+        try:
+            scan = os.scandir(folder)
+        except OSError:
+            continue
+        with scan:
+            for entry in scan:
+                # Hidden files and folders (.git, .DS_Store, ._ temp and resource fork files) are never textures
+                if is_hidden(entry.name):
+                    continue
+                relative_path = relative_folder + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        # Skip user-customs, and everything outside the SLUS folder, without reading their contents
+                        if entry.name == 'user-customs' or (slus_folder and not relative_folder and entry.name != slus_folder):
+                            continue
+                        pending.append((entry.path, relative_path + os.sep))
+                    elif entry.is_file() and (relative_folder or not slus_folder):
+                        # The stat data came with the directory listing on Windows, and costs one call elsewhere
+                        stat = entry.stat()
+                        yield relative_path, stat.st_size, stat.st_mtime_ns
+                except OSError:
+                    continue
+
+def tree_item_path(item, subdirectory):
+    """Path of a Github tree item relative to the repo root, with forward slashes and the subdirectory only once at the front"""
+    # get_tree_contents can hand back OS separators and, on Windows, a doubled prefix like "textures/textures\SLUS..."
+    path = item['path'].replace('\\', '/')
+    prefix = subdirectory.strip('/') + '/'
+    while path.startswith(prefix + prefix):
+        path = path[len(prefix):]
+    return path
+
 def remove_empty_folders(path_abs, debug_mode=False):
     deleted_any = False  # Flag to track if any directories were deleted
 
@@ -242,13 +345,40 @@ def is_remote_file_newer(file_url, file_path, commit_date, debug_mode=False):
             return False
     return True  # Download if the local file doesn't exist
 
-def compute_local_file_hash(file_path, debug_mode=False):
-    with open(file_path, 'rb') as f:
-        data = f.read()
-    s = hashlib.sha1()
-    # Add blob, size of file and '\0' character
-    s.update(("blob %u\0" % len(data)).encode('utf-8'))
-    s.update(data)   
+
+def new_blob_hash(size):
+    """sha1 already fed the git blob header, so hashing the content as it arrives gives the git blob SHA"""
+    blob_hash = hashlib.sha1()
+    blob_hash.update(("blob %u\0" % size).encode('utf-8'))
+    return blob_hash
+
+
+# One read buffer per thread, reused for every file that thread hashes
+hash_buffers = threading.local()
+
+
+def compute_local_file_hash(file_path, debug_mode=False, max_bytes_per_sec=None, chunk_size=1024 * 1024):
+    if getattr(hash_buffers, 'buffer', None) is None or len(hash_buffers.buffer) != chunk_size:
+        hash_buffers.buffer = bytearray(chunk_size)
+    buffer = hash_buffers.buffer
+    view = memoryview(buffer)
+
+    with open(file_path, 'rb', buffering=0) as f:
+        # Add blob, size of file and '\0' character (the size comes from the open file, so it matches what gets read)
+        s = new_blob_hash(os.fstat(f.fileno()).st_size)
+        start_time = time.monotonic()
+        total_read = 0
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            s.update(view[:read])
+            total_read += read
+            # Optional throughput cap, so a background check doesn't hog the disk
+            if max_bytes_per_sec:
+                ahead = total_read / max_bytes_per_sec - (time.monotonic() - start_time)
+                if ahead > 0:
+                    time.sleep(ahead)
     return s.hexdigest()
 
 
@@ -256,6 +386,125 @@ def compare_hashes(local_hash, github_hash, file_path, debug_mode=False):
     return local_hash == github_hash
 
 
+def make_temp_file_path(destination):
+    """Create an empty temp file next to destination (same drive, so os.replace is atomic) and return its path"""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    # The '._' prefix keeps partial files out of the directory tree scans and commit processing
+    fd, temp_path = tempfile.mkstemp(prefix='._', suffix='.part', dir=os.path.dirname(destination))
+    os.close(fd)
+    return temp_path
+
+
+def remove_partial_files(directory):
+    """Delete the temp files (from make_temp_file_path) an interrupted download or sync left behind. Returns how many.
+    Files a sync moved out of the way ('._<name>.move.part') are complete and left alone."""
+    removed = 0
+    for path, dirs, files in os.walk(directory):
+        for name in files:
+            if name.startswith('._') and name.endswith('.part') and not name.endswith('.move.part'):
+                try:
+                    os.remove(os.path.join(path, name))
+                    removed += 1
+                except OSError:
+                    pass
+    return removed
+
+
+def download_to_file(url, destination, headers=None, session=None, timeout=60, chunk_size=1024 * 1024, expected_sha=None, expected_size=None, attempts=3):
+    """Stream url to destination in chunks through a temp file, renamed into place only when complete. Returns the response.
+    With expected_sha, the git blob SHA is checked while streaming and a mismatching download is retried right away."""
+    headers = dict(headers or {})
+    if expected_sha:
+        # Byte counts (Content-Length) only match the content when it isn't compressed in transit
+        headers['Accept-Encoding'] = 'identity'
+
+    for attempt in range(1, attempts + 1):
+        temp_path = make_temp_file_path(destination)
+        try:
+            with (session or requests).get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code != 200:
+                    return response
+
+                size = expected_size if expected_size is not None else response.headers.get('Content-Length')
+                blob_hash = new_blob_hash(int(size)) if expected_sha and size is not None else None
+                written = 0
+                with open(temp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        written += len(chunk)
+                        if blob_hash:
+                            blob_hash.update(chunk)
+
+                if expected_sha:
+                    if blob_hash and written == int(size):
+                        downloaded_sha = blob_hash.hexdigest()
+                    elif blob_hash:
+                        downloaded_sha = None
+                    else:
+                        # No size known up front, so hash the temp file before it becomes visible
+                        downloaded_sha = compute_local_file_hash(temp_path)
+                    if downloaded_sha != expected_sha:
+                        if attempt < attempts:
+                            continue
+                        raise ValueError(f"Downloaded file doesn't match its Github hash after {attempts} attempts: {os.path.basename(destination)}")
+
+                os.replace(temp_path, destination)
+                return response
+        finally:
+            # Never leave a partial file behind (a no-op when it was renamed into place)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+class LocalBlobIndex:
+    """Git blob SHA -> local files with that content, so a download can be served from disk instead of Github"""
+    def __init__(self, hash_file=compute_local_file_hash):
+        self.paths = {}
+        self.lock = threading.Lock()
+        self.hash_file = hash_file
+
+    def add(self, path, sha=None, movable=False):
+        # movable = the file is going away anyway, so it can be renamed instead of copied
+        if not os.path.isfile(path):
+            return
+        sha = sha or self.hash_file(path)
+        with self.lock:
+            self.paths.setdefault(sha, []).append((path, movable))
+
+    def reuse(self, expected_sha, destination):
+        """Put a local file with expected_sha at destination. Returns (source path, moved) or None."""
+        with self.lock:
+            candidates = list(self.paths.get(expected_sha, []))
+        for path, movable in candidates:
+            if os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(destination)):
+                continue
+            if movable:
+                # Claim it first, so two downloads never try to move the same file
+                with self.lock:
+                    if (path, movable) not in self.paths.get(expected_sha, []):
+                        continue
+                    self.paths[expected_sha].remove((path, movable))
+            # Make sure it still has that content (it may have changed since it was indexed)
+            if not os.path.isfile(path) or self.hash_file(path) != expected_sha:
+                continue
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            if movable:
+                os.replace(path, destination)
+            else:
+                temp_path = make_temp_file_path(destination)
+                try:
+                    shutil.copyfile(path, temp_path)
+                    os.replace(temp_path, destination)
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                # The new copy can serve later downloads of the same content too
+                with self.lock:
+                    self.paths[expected_sha].append((destination, False))
+            return path, movable
+        return None
+
+
 def localize_reset_timestamp(limit_reset_timestamp):
     try:
         # Try to get the local timezone of the user
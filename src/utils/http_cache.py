@@ -0,0 +1,135 @@
+import os
+import json
+import hashlib
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .helpers import ConfigManager
+
+
+# Folder holding the cached responses (a .json with the validators and headers, and a .body per URL)
+cache_directory = "utils/http_cache"
+
+# Headers worth keeping with a cached body (Link is needed for pagination)
+kept_headers = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+cache_stats = {"hits": 0, "misses": 0}
+cache_lock = threading.Lock()
+
+
+def cache_paths(url):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return os.path.join(cache_directory, f"{key}.json"), os.path.join(cache_directory, f"{key}.body")
+
+
+def count(stat):
+    with cache_lock:
+        cache_stats[stat] += 1
+
+
+def reset_cache_stats():
+    with cache_lock:
+        cache_stats["hits"] = 0
+        cache_stats["misses"] = 0
+
+
+def get_cache_stats():
+    with cache_lock:
+        return dict(cache_stats)
+
+
+def load_entry(url):
+    meta_path, body_path = cache_paths(url)
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None, None
+    # A different URL with the same hash is not ours
+    if meta.get('url') != url:
+        return None, None
+    return meta, body
+
+
+def save_entry(url, response):
+    meta_path, body_path = cache_paths(url)
+    meta = {
+        'url': url,
+        'encoding': response.encoding,
+        'headers': {name: response.headers[name] for name in kept_headers if name in response.headers},
+    }
+    try:
+        os.makedirs(cache_directory, exist_ok=True)
+        # Body first, so a cut-off write never leaves metadata pointing at a missing body
+        with open(body_path, 'wb') as f:
+            f.write(response.content)
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+    except OSError:
+        return
+    evict_to_size()
+
+
+def response_from_cache(url, meta, body):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.encoding = meta.get('encoding')
+    response.headers = CaseInsensitiveDict(meta.get('headers', {}))
+    response.from_cache = True
+    return response
+
+
+def evict_to_size():
+    # Drop the least recently used entries (oldest modification time) until the cache fits
+    max_bytes = ConfigManager().http_cache_max_mb * 1024 * 1024
+    entries = {}
+    with os.scandir(cache_directory) as scan:
+        for entry in scan:
+            key = entry.name.rsplit('.', 1)[0]
+            stat = entry.stat()
+            size, mtime = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+
+    total = sum(size for size, _ in entries.values())
+    for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+        if total <= max_bytes:
+            break
+        for extension in ('.json', '.body'):
+            try:
+                os.remove(os.path.join(cache_directory, key + extension))
+            except OSError:
+                pass
+        total -= size
+
+
+def cached_get(url, headers=None, timeout=None):
+    """GET an API url, revalidating a cached copy with If-None-Match/If-Modified-Since (a 304 doesn't count against the Github rate limit)"""
+    headers = dict(headers or {})
+    meta, body = load_entry(url)
+    if meta:
+        cached_headers = meta.get('headers', {})
+        if 'ETag' in cached_headers:
+            headers['If-None-Match'] = cached_headers['ETag']
+        if 'Last-Modified' in cached_headers:
+            headers['If-Modified-Since'] = cached_headers['Last-Modified']
+
+    response = requests.get(url, headers=headers, timeout=timeout)
+
+    if response.status_code == 304 and meta:
+        count("hits")
+        # Mark as recently used for the eviction
+        try:
+            os.utime(cache_paths(url)[0])
+        except OSError:
+            pass
+        return response_from_cache(url, meta, body)
+
+    count("misses")
+    if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+        save_entry(url, response)
+    return response
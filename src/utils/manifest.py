@@ -0,0 +1,89 @@
+import os
+import atexit
+import sqlite3
+import threading
+
+from .helpers import compute_local_file_hash
+
+
+# SQLite file with the known hash of every local texture
+manifest_path = "utils/local_manifest.db"
+
+
+class LocalManifest:
+    """path -> (size, mtime_ns, inode, git blob SHA), so a file whose stat hasn't changed is never hashed again"""
+    def __init__(self, db_path=manifest_path, commit_every=200):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self.connection = None
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def connect(self):
+        # Opened on first use, and shared by the worker threads (every access holds the lock)
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, sha TEXT)")
+        return self.connection
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def lookup(self, path, stat):
+        with self.lock:
+            row = self.connect().execute("SELECT size, mtime_ns, inode, sha FROM files WHERE path = ?", (self.key(path),)).fetchone()
+        # Any change in the stat data means the file may have changed, so the hash can't be trusted
+        if row and row[:3] == (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+            return row[3]
+        return None
+
+    def store(self, path, stat, sha):
+        with self.lock:
+            self.connect().execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, sha) VALUES (?, ?, ?, ?, ?)",
+                                   (self.key(path), stat.st_size, stat.st_mtime_ns, stat.st_ino, sha))
+            self.pending += 1
+            if self.pending >= self.commit_every:
+                self.connection.commit()
+                self.pending = 0
+
+    def get_hash(self, path, debug_mode=False, max_bytes_per_sec=None):
+        """Git blob SHA of a local file, from the manifest when the file is unchanged, otherwise hashed and remembered"""
+        # Stat before hashing: if the file changes while being hashed, the next stat won't match and it gets hashed again
+        stat = os.stat(path)
+        sha = self.lookup(path, stat)
+        if sha is None:
+            sha = compute_local_file_hash(path, debug_mode, max_bytes_per_sec)
+            self.store(path, stat, sha)
+        return sha
+
+    def known_hash(self, path):
+        # The remembered hash of an unchanged file, without hashing anything (None if unknown or missing)
+        try:
+            return self.lookup(path, os.stat(path))
+        except OSError:
+            return None
+
+    def record(self, path, sha):
+        # For files just written with a known (verified) SHA, so they never need hashing
+        try:
+            self.store(path, os.stat(path), sha)
+        except OSError:
+            pass
+
+    def forget(self, path):
+        with self.lock:
+            self.connect().execute("DELETE FROM files WHERE path = ?", (self.key(path),))
+            self.pending += 1
+
+    def flush(self):
+        with self.lock:
+            if self.connection is not None and self.pending:
+                self.connection.commit()
+                self.pending = 0
+
+
+# One manifest shared by the sync, the health check and the installer
+manifest = LocalManifest()
+atexit.register(manifest.flush)
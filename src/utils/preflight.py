@@ -0,0 +1,65 @@
+import os
+import psutil
+import tkinter as tk
+
+from .helpers import ConfigManager, save_config_new
+
+
+def get_free_bytes(directory):
+    # Walk up to the nearest folder that exists (the textures folder may not be created yet)
+    directory = os.path.abspath(directory)
+    while not os.path.isdir(directory) and os.path.dirname(directory) != directory:
+        directory = os.path.dirname(directory)
+    return psutil.disk_usage(directory).free
+
+
+def format_size(byte_count):
+    if byte_count >= 1024 ** 3:
+        return f"{byte_count / 1024 ** 3:.2f} GB"
+    return f"{byte_count / 1024 ** 2:.1f} MB"
+
+
+def format_eta(byte_count, throughput):
+    if not throughput:
+        return "unknown (no download speed measured yet)"
+    seconds = int(byte_count / throughput)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours > 0:
+        return f"about {hours} hr {minutes} min"
+    if minutes > 0:
+        return f"about {minutes} min {seconds} sec"
+    return f"about {seconds} sec"
+
+
+def print_preflight(terminal_text, file_count, byte_count, free_bytes, extra_temp_bytes=0):
+    """Print what is about to be transferred, whether it fits on the disk and how long it should take. Returns True if it fits."""
+    throughput = ConfigManager().measured_throughput
+    required_bytes = byte_count + extra_temp_bytes
+    enough_space = required_bytes <= free_bytes
+
+    terminal_text.insert(tk.END, "\n")
+    terminal_text.insert(tk.END, f"Preflight: {file_count} files ({format_size(byte_count)}) to download.\n")
+    if extra_temp_bytes:
+        terminal_text.insert(tk.END, f"Preflight: up to {format_size(extra_temp_bytes)} of temporary space is needed on top of that.\n")
+    terminal_text.insert(tk.END, f"Preflight: {format_size(free_bytes)} free on the disk. {'Enough space.' if enough_space else 'NOT ENOUGH SPACE!'}\n")
+    if throughput:
+        terminal_text.insert(tk.END, f"Preflight: estimated time {format_eta(byte_count, throughput)} at the last measured {throughput / 1024 ** 2:.2f} MB/s.\n")
+    else:
+        terminal_text.insert(tk.END, f"Preflight: estimated time {format_eta(byte_count, throughput)}.\n")
+    terminal_text.insert(tk.END, "\n")
+    terminal_text.see(tk.END)
+
+    return enough_space
+
+
+def record_throughput(byte_count, seconds):
+    # Too little data to say anything about the connection
+    if byte_count < 1024 ** 2 or seconds <= 0:
+        return
+    throughput = byte_count / seconds
+    # Blend with the previous measurement so one slow run doesn't throw off the next estimate
+    previous = ConfigManager().measured_throughput
+    if previous:
+        throughput = (previous + throughput) / 2
+    save_config_new({'measured_throughput': f"{throughput:.0f}"})
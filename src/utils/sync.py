@@ -8,20 +8,29 @@ import time
 import pytz
 from email.utils import parsedate_to_datetime
 import tempfile
+import posixpath
 import shutil
 import argparse
 import tkinter as tk 
 import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException, ConnectTimeout
 
 
 from .helpers import *
 from .fullscan import *
+from .preflight import print_preflight, get_free_bytes, record_throughput
+from .http_cache import cached_get, reset_cache_stats, get_cache_stats
+from .manifest import manifest
 
 # Parse command-line arguments
 parser = argparse.ArgumentParser()
 parser.add_argument('--user_choice', type=str, default='only_new_content',
                     help='Specify whether to do a full scan or only check for new or modified files.')
+parser.add_argument('--dry_run', action='store_true',
+                    help='Print the planned moves, downloads and deletes without changing any files.')
 args = parser.parse_args()
 
 config_manager = ConfigManager()
@@ -43,6 +52,9 @@ github_repo_url = config_manager.github_repo_url
 # Initialize user_choice_var as a global variable
 user_choice_var = config_manager.user_choice_var
 
+# Journal of a sync that is changing files, removed when it finishes. Lists the files moved out of the way.
+sync_journal_path = "utils/sync_journal.txt"
+
 # Initialize counter for commits newer than last sync date
 counter_valid_commits = 0
 # Initialize counter for number of files downloaded
@@ -54,9 +66,144 @@ counter_files_deleted = 0
 config_path = "config.txt"
 
 
+class WorkerTerminal:
+    """Wraps the terminal so worker threads collect their output and the main sync thread prints it in one piece"""
+    def __init__(self, terminal_text):
+        self.terminal_text = terminal_text
+        self.local = threading.local()
+
+    def start_buffer(self):
+        self.local.buffer = []
+
+    def end_buffer(self):
+        buffer = self.local.buffer
+        self.local.buffer = None
+        return ''.join(buffer)
+
+    def insert(self, index, text):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            self.terminal_text.insert(index, text)
+        else:
+            buffer.append(text)
+
+    def yview(self, *args):
+        if getattr(self.local, 'buffer', None) is None:
+            return self.terminal_text.yview(*args)
+
+    def see(self, index):
+        if getattr(self.local, 'buffer', None) is None:
+            self.terminal_text.see(index)
+
+    def __getattr__(self, name):
+        return getattr(self.terminal_text, name)
+
+
+def plan_net_changes(events):
+    """Reduce file events (commit_date, file_info), oldest first, to one final action per path: moves, then downloads, then deletes"""
+    # Files as they are at the end, keyed by their final path. 'origin' is the path the file had before the
+    # first event (None for new files), so a chain of renames becomes a single move.
+    current = {}
+    # Paths that existed before the first event and were removed along the way
+    removed_origins = set()
+
+    for commit_date, file_info in events:
+        status = file_info.get('status')
+        path = file_info['filename']
+        # Copies are new files and 'changed' is a mode change, both handled like their closest status
+        if status == 'copied':
+            status = 'added'
+        elif status == 'changed':
+            status = 'modified'
+
+        if status == 'added':
+            entry = {'origin': None, 'changed': True}
+            current[path] = entry
+        elif status in ('modified', 'renamed'):
+            previous_path = file_info.get('previous_filename', path) if status == 'renamed' else path
+            entry = current.pop(previous_path, None) or {'origin': previous_path, 'changed': False}
+            entry['changed'] = entry['changed'] or status == 'modified' or file_info.get('changes', 0) > 0
+            current[path] = entry
+        elif status == 'removed':
+            entry = current.pop(path, None)
+            origin = entry['origin'] if entry else path
+            if origin:
+                removed_origins.add(origin)
+            continue
+        else:
+            continue
+
+        entry.update({'sha': file_info.get('sha'), 'raw_url': file_info.get('raw_url'), 'commit_date': commit_date})
+
+    moves, downloads, deletes = [], [], []
+    moved_origins = set()
+    for path, entry in current.items():
+        file_info = {'filename': path, 'sha': entry['sha'], 'raw_url': entry['raw_url']}
+        if entry['origin'] is None:
+            downloads.append(({**file_info, 'status': 'added'}, entry['commit_date']))
+        elif entry['origin'] != path:
+            moved_origins.add(entry['origin'])
+            moves.append(({**file_info, 'status': 'renamed', 'previous_filename': entry['origin']}, entry['commit_date']))
+        elif entry['changed']:
+            downloads.append(({**file_info, 'status': 'modified'}, entry['commit_date']))
+
+    for origin in sorted(removed_origins):
+        # Nothing to delete if the path was written again or the file lives on under another name
+        if origin not in current and origin not in moved_origins:
+            deletes.append(({'filename': origin, 'status': 'removed'}, None))
+
+    return order_moves(moves) + downloads + deletes
+
+
+def order_moves(moves):
+    """Order the moves so none overwrites a file that still has to move away. Files that swap places (or move
+    in a circle) are broken up by first stashing one of them under a temporary name, a move marked 'stash'."""
+    # Moves by the path they take the file from
+    pending = {file_info['previous_filename']: (file_info, commit_date) for file_info, commit_date in moves}
+    ordered = []
+    while pending:
+        # A move is safe once nothing else still has to leave its destination
+        ready = [origin for origin, (file_info, _) in pending.items() if file_info['filename'] not in pending]
+        if ready:
+            for origin in ready:
+                ordered.append(pending.pop(origin))
+            continue
+        # Only circles are left: stash one file, which frees its path for the move into it
+        origin = min(pending)
+        file_info, commit_date = pending.pop(origin)
+        temp_path = posixpath.join(posixpath.dirname(origin), f"._{posixpath.basename(origin)}.move.part")
+        ordered.append(({'filename': temp_path, 'previous_filename': origin, 'destination': file_info['filename'], 'status': 'renamed', 'stash': True}, commit_date))
+        pending[temp_path] = ({**file_info, 'previous_filename': temp_path}, commit_date)
+    return ordered
+
+
+def recover_interrupted_sync(directory):
+    """Clean up after a sync that was cut off, going by its journal: put files it moved out of the way where they
+    were going (or back where they came from) and delete its half-written files. Returns (restored, removed)."""
+    restored = 0
+    with open(sync_journal_path, 'r', encoding='utf-8') as journal_file:
+        for line in journal_file:
+            try:
+                stash_path, origin_path, destination_path = line.rstrip('\n').split('\t')
+            except ValueError:
+                continue
+            if not os.path.exists(stash_path):
+                continue
+            # Anywhere that's free, the next sync checks the hash before using it
+            for target in (destination_path, origin_path):
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(stash_path, target)
+                    restored += 1
+                    break
+    return restored, remove_partial_files(directory)
 
 
 def main_sync(user_choice, terminal_text, github_token, last_run_date):
+    # The sync's file work runs on a pool of workers, which print through this wrapper
+    terminal_text = WorkerTerminal(terminal_text)
+    # Count the cached API responses of this sync only
+    reset_cache_stats()
 
     terminal_text.insert(tk.END, f"    Full sync choice: {user_choice}\n")
     terminal_text.insert(tk.END, f"    GitHub Token: {github_token}\n")
@@ -70,10 +217,59 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
             # Handle invalid date format
             last_run_date = datetime(2005, 7, 11, 0, 0, 0)
 
+    # The commit the last sync brought the textures up to. Only trusted if the Last Sync Date wasn't changed
+    # by hand since, as setting an older date is the way to ask for a re-check of that period.
+    sync_config = ConfigManager()
+    last_synced_sha = sync_config.last_synced_sha
+    last_synced_tree = sync_config.last_synced_tree
+    if sync_config.last_run_date is None or last_run_date != sync_config.last_run_date:
+        last_synced_sha = None
+        last_synced_tree = None
+
+    # Commit and tree currently at the top of the branch, saved as the anchor for the next sync when this one finishes
+    head_sha = None
+    head_tree = None
 
     # For write_last_run_date
     config_path = "config.txt"
 
+    # Workers for the downloads and deletes, sharing one pool of connections
+    sync_workers = sync_config.sync_workers
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=sync_workers, pool_maxsize=sync_workers))
+    counter_lock = threading.Lock()
+    # Bytes downloaded from Github this sync, for the throughput the next preflight estimates with
+    downloaded_bytes = [0]
+
+    # Local files whose content a planned download can be served from (filled in when the plan runs)
+    local_blobs = LocalBlobIndex(hash_file=manifest.get_hash)
+    # The Github tree, for verifying, the sizes in the preflight and finding local copies of planned downloads.
+    # Only fetched once something needs it, as it can take many requests and a sync with nothing to do needs none.
+    tree_data = None
+    tree_fetched = False
+
+    def load_tree_data():
+        nonlocal tree_data, tree_fetched
+        if not tree_fetched:
+            tree_fetched = True
+            # get_tree_contents exits when Github refuses the request, which mustn't end the sync here
+            try:
+                tree_data = get_tree_contents(owner, repo, subdirectory, branch_name)
+            except (Exception, SystemExit) as e:
+                terminal_text.insert(tk.END, f"Couldn't get the Github tree, carrying on without it (debug info: {e})\n\n")
+                scroll_terminal()
+        return tree_data
+
+    def count_downloaded():
+        global counter_files_downloaded  # Declare the global variable
+        with counter_lock:
+            counter_files_downloaded += 1
+
+    def count_deleted():
+        global counter_files_deleted  # Declare the global variable
+        with counter_lock:
+            counter_files_deleted += 1
+
     def scroll_terminal():
         terminal_text.yview(tk.END) 
         terminal_text.see(tk.END)
@@ -86,7 +282,10 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
             # Format and convert the UTC time to a string with milliseconds
             utc_time_str = utc_now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
             last_run_date = utc_time_str
-            save_config_new({'last_run_date': last_run_date, 'initial_setup_done': 'True'})
+            sync_state = {'last_run_date': last_run_date, 'initial_setup_done': 'True'}
+            if head_sha:
+                sync_state.update({'last_synced_sha': head_sha, 'last_synced_tree': head_tree})
+            save_config_new(sync_state)
             terminal_text.insert(tk.END, "Last Sync Date updated.\n")
 
         except:
@@ -95,7 +294,44 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
             scroll_terminal()
 
 
-    def download_file(url, destination, counter_files_downloaded, commit_date=None, debug_mode=False, hash_comparison=True):
+    # Get the commit at the top of the branch and the tree it points to
+    def get_branch_head():
+        head_url = f"https://api.github.com/repos/{github_repo_url}/commits/{branch_name}"
+        headers = {"Authorization": f"Bearer {github_token}"}
+        try:
+            response = cached_get(head_url, headers=headers, timeout=10)
+            if response.status_code == 200:
+                head = response.json()
+                return head['sha'], head['commit']['tree']['sha']
+        except (RequestException, ValueError, KeyError, TypeError) as e:
+            # Without the head the sync just reviews the changes since the Last Sync Date
+            terminal_text.insert(tk.END, f"Couldn't get the latest commit from Github ({e}). Reviewing by date instead.\n")
+            scroll_terminal()
+        return None, None
+
+
+    # Put the file at target from a local file with the same content if there is one, otherwise download it
+    def fetch_file(url, target, expected_sha):
+        reused = local_blobs.reuse(expected_sha, target) if expected_sha else None
+        if reused:
+            source, moved = reused
+            manifest.record(target, expected_sha)
+            if moved:
+                manifest.forget(source)
+            terminal_text.insert(tk.END, f"    {'Moved' if moved else 'Copied'} from {os.path.relpath(source, local_directory)} (same content, nothing to download): {os.path.basename(target)}\n")
+            scroll_terminal()
+            return 200, True
+        status_code = download_to_file(url, target, session=session, expected_sha=expected_sha).status_code
+        if status_code == 200:
+            with counter_lock:
+                downloaded_bytes[0] += os.path.getsize(target)
+        # Verified against the SHA while downloading, so the manifest can have it without hashing the file again
+        if status_code == 200 and expected_sha:
+            manifest.record(target, expected_sha)
+        return status_code, False
+
+
+    def download_file(url, destination, commit_date=None, debug_mode=False, hash_comparison=True, expected_sha=None):
 
         # Create the folder if it doesn't exist
         os.makedirs(os.path.dirname(destination), exist_ok=True)
@@ -106,44 +342,52 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
         if os.path.exists(dashed_file_path):
             # Check if the dashed file is not newer, download the original file as the dashed file
             if commit_date is None or not hash_comparison:
-                with open(dashed_file_path, 'wb') as f:
-                    f.write(requests.get(url).content)
-                    counter_files_downloaded += 1
+                status_code, reused = fetch_file(url, dashed_file_path, expected_sha)
+                if reused:
+                    return
+                if status_code == 200:
+                    count_downloaded()
                     if debug_mode == 'True':
                         terminal_text.insert(tk.END, f"    Downloaded: {os.path.basename(url)} as {os.path.basename(dashed_file_path)}\n")
                         scroll_terminal()
                     else:
                         terminal_text.insert(tk.END, f"    Downloaded: {os.path.basename(dashed_file_path)}\n")
                         scroll_terminal()
-                return counter_files_downloaded  # Return the updated counter
+                else:
+                    terminal_text.insert(tk.END, f"Failed to download file. Status Code: {status_code}\n")
+                    scroll_terminal()
+                return
             else:
                 terminal_text.insert(tk.END, f"    Skipping download because exists and is current (with prepended dash).\n")
                 scroll_terminal()
-                return counter_files_downloaded  # Return the current counter
+                return
 
         # Download the file with the original name
-        response = requests.get(url)
-        if response.status_code == 200:
-            with open(destination, 'wb') as f:
-                f.write(response.content)
-                counter_files_downloaded += 1
-                if debug_mode == 'True':
-                    terminal_text.insert(tk.END, f"    Downloaded: {os.path.basename(url)} as {os.path.basename(destination)}\n")
-                    scroll_terminal()
-                else:
-                    terminal_text.insert(tk.END, f"    Downloaded: {os.path.basename(destination)}\n")
-                    scroll_terminal()
+        status_code, reused = fetch_file(url, destination, expected_sha)
+        if reused:
+            return
+        if status_code == 200:
+            count_downloaded()
+            if debug_mode == 'True':
+                terminal_text.insert(tk.END, f"    Downloaded: {os.path.basename(url)} as {os.path.basename(destination)}\n")
+                scroll_terminal()
+            else:
+                terminal_text.insert(tk.END, f"    Downloaded: {os.path.basename(destination)}\n")
+                scroll_terminal()
         else:
-            terminal_text.insert(tk.END, f"Failed to download file. Status Code: {response.status_code}\n")
+            terminal_text.insert(tk.END, f"Failed to download file. Status Code: {status_code}\n")
             scroll_terminal()
 
-        return counter_files_downloaded  # Return the updated counter
+        return
 
 
 
 
     def download_files(repo_url, local_path, branch='main', subdirectory='', debug_mode=False):
-        api_url = f"https://api.github.com/repos/{repo_url}/commits?path={subdirectory}&sha={branch_name}"
+        api_url = f"https://api.github.com/repos/{repo_url}/commits?path={subdirectory}&sha={branch_name}&per_page=100"
+        # Let Github leave out the commits from before the last sync instead of paging through the whole history
+        if user_choice != 'full_scan' and isinstance(last_run_date, datetime):
+            api_url += f"&since={last_run_date.strftime('%Y-%m-%dT%H:%M:%SZ')}"
         headers = {"Authorization": f"Bearer {github_token}"}
         global counter_files_downloaded  # Declare the global variable
         global counter_files_deleted  # Declare the global variable
@@ -179,31 +423,779 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
             scroll_terminal()
 
 
+        # Apply one changed file (as listed in a commit or a compare) to the local textures folder
+        def process_file_info(file_info, commit_date=None):
+            # Set by the hash checks below
+            hash_comparison = False
+            local_file_hash = ""
+
+            file_status = file_info.get('status')  # New, modified, or deleted
+            file_sha = file_info.get('sha')  # hash
+
+            if debug_mode == 'True':
+                terminal_text.insert(tk.END, f"======== NEXT FILE ==============\n")
+                self.terminal_text.yview(tk.END) 
+                terminal_text.see(tk.END)
+
+            # Get the URL to the item
+            file_url = file_info.get('raw_url')
+            # Get the name of the file or folder
+            file_or_folder_name = os.path.basename(file_info['filename'])
+            # Build the relative path
+            relative_path = os.path.relpath(file_info['filename'], start=subdirectory)
+
+            # Ignore git and certain (but not all) hidden files and folders
+            if file_or_folder_name.startswith(('.git', '.DS', '._')):
+                starter_line(file_status, relative_path)
+                terminal_text.insert(tk.END, f"    Skipping hidden file or directory.\n")
+                scroll_terminal()
+                return
+
+            if 'user-customs' in relative_path:
+                starter_line(file_status, relative_path)
+                terminal_text.insert(tk.END, f"    Skipping file with 'user-customs' in its path.\n")
+                scroll_terminal()
+                return
+
+            # Check if the file is outside the specified subdirectory but only if the status wasn't "modified" (handle that later)
+            if file_status != 'renamed':
+                if debug_mode == 'True':
+                    terminal_text.insert(tk.END, "    Checking if outside of specified directory by seeing if relative_path starts with '..'.\n")
+                    terminal_text.insert(tk.END, f"    relative_path: {relative_path}\n")
+                    scroll_terminal()
+                if relative_path.startswith('..') or os.path.isabs(relative_path):
+                    if debug_mode == 'True':
+                        starter_line(file_status, relative_path)
+                        terminal_text.insert(tk.END, f"    Outside of specified subdirectory. Skipping file: {file_info['filename']}\n")
+                        scroll_terminal()
+                    else:
+                        starter_line(file_status, relative_path)
+                        terminal_text.insert(tk.END, f"    Skipping download because outside of specified subdirectory.\n")
+                        scroll_terminal()
+                    return
+
+            # Build the local absolute path
+            file_path = os.path.join(local_path, relative_path)
+            if debug_mode == 'True':
+                terminal_text.insert(tk.END, f"    file_path: {file_path}\n")
+
+
+
+            # Common for ADDED or MODIFIED or RENAMED
+            if file_status == 'added' or file_status == 'modified' or file_status == 'renamed':
+
+                # Check if the file is has already been processed
+                if debug_mode == 'True':
+                    terminal_text.insert(tk.END, f"    Checking if in finished_files_set before running hash tests.\n")
+                if file_path not in finished_files_set:
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, f"    Not in finished_files_set.\n")
+                    if os.path.exists(file_path):
+                        # Compute the local hash
+                        if debug_mode == True:
+                            terminal_text.insert(tk.END, f"\n  Hash check file path: {file_path}\n")
+                        local_file_hash = manifest.get_hash(file_path, debug_mode)
+                        # Compare local hash to github file hash
+                        if debug_mode == True:
+                            terminal_text.insert(tk.END, f"  Comparing hashes for: {file_path}\n")  
+                        hash_comparison = compare_hashes(local_file_hash, file_sha, file_path, debug_mode)
+
+                    # Check for prepended version and use that unless there is also the normal/non-prepended version
+                    else:
+                        if debug_mode == 'True':
+                            terminal_text.insert(tk.END, "    LOCAL PATH DOESN'T EXIST. Checking if there is a disabled/prepended version.\n")
+                            # Split the path into directory and filename
+                        directory, filename = os.path.split(file_path)
+                        # Add a dash before the final segment (filename or folder)
+                        modified_filename = '-' + filename
+                        # Join the directory and modified filename to get the new path
+                        file_path_prepended = os.path.join(directory, modified_filename)
+                        # Check if disabled/prepended version exists
+                        if os.path.exists(file_path_prepended):
+                            # Redefine file_path to prepended name
+                            if debug_mode == 'True':
+                                terminal_text.insert(tk.END, f"    It exists. Modifying path for hash comparison to: {file_path_prepended}\n")
+                            # Compute the local hash
+                            if debug_mode == True:
+                                terminal_text.insert(tk.END, f"  Hash check file path: {file_path}\n")
+                            local_file_hash = manifest.get_hash(file_path_prepended, debug_mode)
+                            if debug_mode == 'True':
+                                terminal_text.insert(tk.END, f"    Computed hash for file_path_prepended is {local_file_hash}\n")
+                            # Compare local hash to github file hash
+                            if debug_mode == True:
+                                terminal_text.insert(tk.END, f"  Comparing hashes for: {file_path}\n")  
+                            hash_comparison = compare_hashes(local_file_hash, file_sha, file_path, debug_mode)
+                            if debug_mode == 'True':
+                                terminal_text.insert(tk.END, f"    Is remote has same as file_path_prepended: {hash_comparison}\n")
+                        else:
+                            if debug_mode == 'True':
+                                terminal_text.insert(tk.END, f"    Disabled/prepended file doesn't exist: {file_path}\n")
+                            hash_comparison = False
+                    scroll_terminal()
+                else:
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, f"    In finished_files_set. Skipping hash tests.\n")
+                        scroll_terminal()
+
+
+                # Detailed output for debug mode
+                if debug_mode == 'True':
+                    # terminal_text.insert(tk.END, f"- {file_status} File: {file_info['filename']}, Relative Path: {relative_path}\n")
+                    starter_line(file_status, relative_path)
+                    terminal_text.insert(tk.END, f"    Remote hash: {file_sha}\n")
+                    scroll_terminal()
+                    # initialize variable
+                    local_file_hash = "" 
+                    if local_file_hash:
+                        terminal_text.insert(tk.END, f"    Local_file_hash exists as {local_file_hash}.\n")
+                        if hash_comparison == True:
+                            terminal_text.insert(tk.END, f"    Local hash: {local_file_hash}\n")
+                            terminal_text.insert(tk.END, "    HASHES ARE SAME.\n")
+                            scroll_terminal()
+                        else:
+                            terminal_text.insert(tk.END, f"    Local hash: {local_file_hash}\n")
+                            terminal_text.insert(tk.END, "    DIFFERENT HASHES.\n")
+                            scroll_terminal()
+
+                    sys.stdout.flush()
+                # Normal output
+                else:
+                    starter_line(file_status, relative_path)
+
+
+            # ADDED or MODIFIED
+            if file_status == 'added' or file_status == 'modified':
+
+                # Check if the file is has already been processed
+                if debug_mode == 'True':
+                    terminal_text.insert(tk.END, f"    Checking if in finished_files_set.\n")
+                    scroll_terminal()
+                if file_path in finished_files_set:
+                    terminal_text.insert(tk.END, f"    Skipping because already processed in a newer commit.\n")
+                    scroll_terminal()
+                    return
+                else:
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, f"    Not in finished_files_set.\n")
+
+                if file_status == 'added':
+                    if not os.path.exists(file_path) or not hash_comparison:
+                        download_file(file_url, file_path, commit_date, debug_mode, hash_comparison, file_sha)
+                    else:
+                        terminal_text.insert(tk.END, f"    Skipping download because file exists and matches github file.\n")
+                    # Add to finished file set to skip processing in older commits
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, f"    Adding to the finished_files_set.\n")
+                    add_to_finished_files_set(file_path, debug_mode)   
+                    scroll_terminal()
+                    return
+
+
+                if file_status == 'modified':
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, f"    Check if hash is different before downloading: {file_path}\n")  # Debugging output
+                        scroll_terminal()
+                    if not os.path.exists(file_path) or not hash_comparison:
+                        # Download the file (or prepended file) and update the counter
+                        download_file(file_url, file_path, commit_date, debug_mode, hash_comparison, file_sha)
+                    else:
+                        terminal_text.insert(tk.END, f"    Skipping download because files are identical.\n")
+                        scroll_terminal()
+                    # Add to finished file set to skip processing in older commits
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, f"    Adding to the finished_files_set.\n")
+                        scroll_terminal()
+                    add_to_finished_files_set(file_path, debug_mode)   
+                    scroll_terminal()
+                    return
+
+            elif file_status == 'renamed':
+                old_file_relative_path = os.path.relpath(file_info['previous_filename'], start=subdirectory)
+                old_file_path = os.path.join(local_path, old_file_relative_path)
+                new_file_path = file_path
+                new_file_dir = os.path.dirname(new_file_path)
+
+                # Info on what happened in the commit
+                if debug_mode == 'True':
+                    terminal_text.insert(tk.END, f"    In commit, {old_file_relative_path} renamed to {relative_path}.\n")
+                    scroll_terminal()
+
+                try:
+
+                    # Check if the file is has already been processed
+                    if file_path in finished_files_set:
+                        # Add the old name if it's not already in the set
+                        terminal_text.insert(tk.END, f"    Skipping because new or old path already processed in a newer commit.\n")
+                        scroll_terminal()
+                        if debug_mode == 'True':
+                                terminal_text.insert(tk.END, f"    Adding old path to the finished_files_set. New path was already there.\n")
+                                scroll_terminal()
+                        add_to_finished_files_set(old_file_path)  
+                        scroll_terminal()
+                        return
+
+                    # Check if activity was all outside of the subdirectory and skip to next file if so
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, "    Checking if all activity was outside of specified directory by seeing if relative_paths both start with '..'.\n")
+                        terminal_text.insert(tk.END, f"    New path: {relative_path}\n")
+                        terminal_text.insert(tk.END, f"    Old Path: {old_file_relative_path}\n")
+                        scroll_terminal()
+                    # Checking both old and new file names 
+                    if relative_path.startswith('..') or os.path.isabs(relative_path):
+                        if old_file_relative_path.startswith('..') or os.path.isabs(old_file_relative_path):
+                            terminal_text.insert(tk.END, f"    Old name and new name outside of specified subdirectory. Skipping file.\n")
+                            scroll_terminal()
+                            return
+                    else:
+                        if debug_mode == 'True':
+                            terminal_text.insert(tk.END, "    One or both of the old/new filenames are inside the specified subdirectory. Proceeding...\n")
+
+
+                    # Check if new file name is outside of the subdirectory, and if so, just delete the local file instead of moving it
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, "    Checking if the new/desination file name is outside of the specified subdirectory by seeing if its relative path starts with '..'.\n")
+                        terminal_text.insert(tk.END, f"    New path: {relative_path}\n")
+                        scroll_terminal()
+                    # Checking new file name
+                    if relative_path.startswith('..') or os.path.isabs(relative_path):
+                        if debug_mode:
+                            terminal_text.insert(tk.END, f"    New name is outside of specified directory. Looking for the old file...\n")
+                        # terminal_text.update_idletasks()
+                        # terminal_text.after(100)
+                        # Check if old file exists
+                        if os.path.exists(old_file_path):
+                            if debug_mode:
+                                terminal_text.insert(tk.END, f"    Found the old name file Deleting...\n")
+                            os.remove(old_file_path)
+                            count_deleted()
+                            terminal_text.insert(tk.END, f"    Deleted {file_info['previous_filename']}\n")
+                        else:
+                            terminal_text.insert(tk.END, f"    File has already been deleted locally.\n")
+                            terminal_text.yview(tk.END) 
+                            terminal_text.see(tk.END)
+                        if debug_mode == 'True':
+                            terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
+                        add_to_finished_files_set(old_file_path)  
+                        add_to_finished_files_set(new_file_path)  
+
+                        # terminal_text.update_idletasks()
+                        # terminal_text.after(100)
+                        return
+
+
+                    # Check if new old name is outside of the subdirectory, and if so, download the new name file
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, "    Checking if the old file name is outside of the specified subdirectory by seeing if its relative path starts with '..'.\n")
+                        terminal_text.insert(tk.END, f"    Old path: {old_file_path}\n")
+                        scroll_terminal()
+                    # Checking new file name
+                    if old_file_relative_path.startswith('..') or os.path.isabs(old_file_relative_path):
+                        if debug_mode:
+                            terminal_text.insert(tk.END, f"    Old name is outside of specified directory. Downloading the new file.\n")
+                        if debug_mode == 'True':
+                            terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
+                        add_to_finished_files_set(old_file_path)  
+                        add_to_finished_files_set(new_file_path)  
+                        download_file(file_url, file_path, commit_date, debug_mode, hash_comparison, file_sha)
+                        scroll_terminal()
+
+                        terminal_text.update_idletasks()
+                        terminal_text.after(100)
+                        return
+
+                    # Check for the old filename to see if the file exists
+                    if os.path.exists(old_file_path):
+                        # File with the old name exists, compute the hash and compare it with the GitHub file hash
+
+                        # Compute the local hash
+                        if debug_mode == True:
+                            terminal_text.insert(tk.END, f"\n  Hash check for old file path: {old_file_path}\n")
+                        local_file_hash = manifest.get_hash(old_file_path, debug_mode)
+
+                        # Compare local hash to GitHub file hash
+                        if debug_mode == True:
+                            terminal_text.insert(tk.END, f"  Comparing hashes for: {old_file_path}\n")
+                        hash_comparison = compare_hashes(local_file_hash, file_sha, old_file_path, debug_mode)
+
+                        if hash_comparison:
+                            # Hashes match, proceed with renaming the file
+                            terminal_text.insert(tk.END, f"    Hashes match. Proceeding with renaming the file.\n")
+                        else:
+                            # Hashes don't match, download the file
+                            terminal_text.insert(tk.END, f"    Hashes don't match. Downloading the correct version of the file.\n")
+                            download_file(file_url, old_file_path, commit_date, debug_mode, hash_comparison, file_sha)
+
+                        # Create directory if needed
+                        if not os.path.exists(new_file_dir):
+                            try:
+                                os.makedirs(new_file_dir)
+                                # terminal_text.insert(tk.END, f"    Created missing directories: {new_file_dir}\n")
+                                scroll_terminal()
+                            except Exception as e:
+                                terminal_text.insert(tk.END, f"    ERROR creating directories: {e}\n")
+                                terminal_text.insert(tk.END, traceback.format_exc())
+                                scroll_terminal()
+                                return
+
+                        # Rename the file
+                        os.rename(old_file_path, new_file_path)
+                        if debug_mode == 'True':
+                            terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
+                        add_to_finished_files_set(old_file_path)
+                        add_to_finished_files_set(new_file_path)
+                        terminal_text.insert(tk.END, f"    Renamed: {file_info['previous_filename']} to {relative_path}\n")
+                        scroll_terminal()
+
+                        return
+
+
+
+                    # Check for a disabled/prepended version of the old filename
+                    directory, filename = os.path.split(old_file_path)
+                    # Add a dash before the final segment (filename or folder)
+                    modified_old_filename = '-' + filename
+                    # Join the directory and modified filename to get the new path
+                    old_file_path_prepended = os.path.join(directory, modified_old_filename)
+
+                    # terminal_text.insert(tk.END, f"    Checking if prepended version of old file exists at {old_file_path_prepended}...\n")
+
+                    # Check if disabled/prepended version exists
+                    if os.path.exists(old_file_path_prepended):
+
+                        # Compute the local hash
+                        if debug_mode == True:
+                            terminal_text.insert(tk.END, f"\n  Hash check for prepended file path: {old_file_path_prepended}\n")
+                        local_file_hash = manifest.get_hash(old_file_path_prepended, debug_mode)
+
+                        # Compare local hash to GitHub file hash
+                        if debug_mode == True:
+                            terminal_text.insert(tk.END, f"  Comparing hashes for: {old_file_path_prepended}\n")
+                        hash_comparison = compare_hashes(local_file_hash, file_sha, old_file_path_prepended, debug_mode)
+
+                        if hash_comparison:
+                            # Hashes match, proceed with renaming the file
+                            terminal_text.insert(tk.END, f"    Hashes match. Proceeding with renaming the prepended file.\n")
+                        else:
+                            # Hashes don't match, download the file
+                            terminal_text.insert(tk.END, f"    Hashes don't match. Downloading the correct version of the file.\n")
+                            download_file(file_url, old_file_path_prepended, commit_date, debug_mode, hash_comparison, file_sha)
+
+                        # Ensure the destination directory exists
+                        new_file_dir = os.path.dirname(new_file_path)
+                        if not os.path.exists(new_file_dir):
+                            try:
+                                os.makedirs(new_file_dir)
+                                # terminal_text.insert(tk.END, f"    Created missing directories: {new_file_dir}\n")
+                                scroll_terminal()
+                            except Exception as e:
+                                terminal_text.insert(tk.END, f"    ERROR creating directories: {e}\n")
+                                terminal_text.insert(tk.END, traceback.format_exc())
+                                scroll_terminal()
+                                return
+
+                        # Disabled/prepended file with the old name exists, rename it to the new name
+                        if debug_mode == 'True':
+                            terminal_text.insert(tk.END, f"    Old file name doesn't exist, but a disabled/prepended file with the old name exists. Renaming it to the new name.\n")
+                            # terminal_text.insert(tk.END, f"    From: {old_file_path_prepended}\n")
+                            # terminal_text.insert(tk.END, f"    To: {new_file_path}\n")
+                            scroll_terminal()
+
+                        # Create a path and name for the new prepended file location
+                        directory_new, filename_new = os.path.split(new_file_path)
+                        # Add a dash before the final segment (filename or folder)
+                        modified_new_filename = '-' + filename_new
+                        # Join the directory and modified filename to get the new path
+                        new_file_path_prepended = os.path.join(directory_new, modified_new_filename)
+
+                        try:
+                            os.rename(old_file_path_prepended, new_file_path_prepended)
+                            if debug_mode == 'True':
+                                terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
+                            add_to_finished_files_set(old_file_path)  
+                            add_to_finished_files_set(new_file_path)  
+                            terminal_text.insert(tk.END, f"    Renamed: {modified_old_filename} version of to {relative_path}\n")
+                            scroll_terminal()
+                        except Exception as e:
+                            terminal_text.insert(tk.END, f"    ERROR in renaming file: {e}\n")
+                            terminal_text.insert(tk.END, traceback.format_exc())  # Logs the traceback
+                            scroll_terminal()
+                            return
+
+                    # Check for the new filename to see if file exists and if it is current
+                    elif os.path.exists(new_file_path):
+                        if not hash_comparison:
+                            # Download the file and update the counter
+                            terminal_text.insert(tk.END, f"    Downloading because the version of new file on github is newer.\n")
+                            download_file(file_url, file_path, commit_date, debug_mode, hash_comparison, file_sha)
+                            if debug_mode == 'True':
+                                terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
+                            add_to_finished_files_set(old_file_path)  
+                            add_to_finished_files_set(new_file_path)  
+                        else:
+                            # File with the new name already exists
+                            if debug_mode == 'True':
+                                terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
+                            add_to_finished_files_set(old_file_path)  
+                            add_to_finished_files_set(new_file_path)  
+                            terminal_text.insert(tk.END, f"    Skipping download because already exists with the new name and is current.\n")
+                        scroll_terminal()
+                        return
+
+                    else:
+                        # Download the file  and update the counter
+                        if debug_mode == 'True':
+                            terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
+                        add_to_finished_files_set(old_file_path)  
+                        add_to_finished_files_set(new_file_path)  
+                        if debug_mode == 'True':
+                            terminal_text.insert(tk.END, f"    Downloading because neither the new or old path exist.\n")
+                        # Proceed to download logic
+                        download_file(file_url, file_path, commit_date, debug_mode, hash_comparison, file_sha)
+                        scroll_terminal()
+
+                except Exception as e:
+                    terminal_text.insert(tk.END, f"    ERROR processing renamed file: {e}\n")
+                    scroll_terminal()
+
+                # terminal_text.update_idletasks()
+                # terminal_text.after(100)
+                return
+
+            elif file_status == 'removed':
+
+                starter_line(file_status, relative_path)
+
+                # # Check if the file is outside the specified subdirectory
+                # if debug_mode == 'True':
+                #     terminal_text.insert(tk.END, "    Checking if outside of specified directory by seeing if relative_path starts with '..'.\n")
+                #     terminal_text.insert(tk.END, f"    relative_path: {relative_path}")
+                # if relative_path.startswith('..') or os.path.isabs(relative_path):
+                #     if debug_mode == 'True':
+                #         terminal_text.insert(tk.END, f"    Outside of specified subdirectory. Skipping file: {file_info['filename']}")
+                #     else:
+                #         terminal_text.insert(tk.END, f"    Skipping because outside of specified subdirectory.\n")
+                #     scroll_terminal()
+                #     continue
+
+                # Check if the file is has already been processed
+                if file_path in finished_files_set:
+                    terminal_text.insert(tk.END, f"    Skipping because already processed in a newer commit.\n")
+                    scroll_terminal()
+                    return
+
+                # Add to finished file set to skip processing in older commits
+                if debug_mode == 'True':
+                    terminal_text.insert(tk.END, f"    Adding deleted path to the finished_files_set.\n")
+                add_to_finished_files_set(file_path, debug_mode)
+
+                # If passed all of those checks, check if the file exists, and if so, delete it.
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                    count_deleted()
+                    if debug_mode:
+                        terminal_text.insert(tk.END, f"    Deleted {file_info['filename']} from {relative_path}\n")
+                    else:
+                        terminal_text.insert(tk.END, f"    Deleted {relative_path}\n")
+                else:
+                    if debug_mode == 'True':
+                        terminal_text.insert(tk.END, "    LOCAL PATH DOESN'T EXIST. Checking if there is a disabled/prepended version.\n")
+                        scroll_terminal()
+                        # Split the path into directory and filename
+                    directory, filename = os.path.split(file_path)
+                    # Add a dash before the final segment (filename or folder)
+                    modified_filename = '-' + filename
+                    # Join the directory and modified filename to get the new path
+                    file_path_prepended = os.path.join(directory, modified_filename)
+                    # Check if disabled/prepended version exists
+                    if os.path.exists(file_path_prepended):
+                        if debug_mode == 'True':
+                            terminal_text.insert(tk.END, f"    Prepended version exists at: {file_path_prepended}\n")
+                            scroll_terminal()
+                        # Delete the prepended version
+                        os.remove(file_path_prepended)
+                        count_deleted()
+                        terminal_text.insert(tk.END, f"    Deleted disabled/prepended version because normal named version doesn't exist. \n")
+                        scroll_terminal()
+                    else:
+                        terminal_text.insert(tk.END, f"    File has already been deleted from local.\n")
+                        scroll_terminal()
+
+
+                # scroll_terminal()
+                # terminal_text.update_idletasks()
+                # terminal_text.after(100)
+                return
+
+
+            else:
+                terminal_text.insert(tk.END, f"Unknown file status: {file_status}\n")
+                scroll_terminal()
+
+
+        # Run the planned actions, or only print them for a dry run
+        def apply_plan(plan):
+            moves = sum(1 for file_info, _ in plan if file_info['status'] == 'renamed' and not file_info.get('stash'))
+            deletes = sum(1 for file_info, _ in plan if file_info['status'] == 'removed')
+            stashes = sum(1 for file_info, _ in plan if file_info.get('stash'))
+            terminal_text.insert(tk.END, f"Plan: {moves} files to move, {len(plan) - moves - deletes - stashes} to check and download, {deletes} to delete.\n")
+            scroll_terminal()
+            if len(plan) - moves - deletes - stashes:
+                load_tree_data()
+            print_plan_preflight(plan)
+
+            if args.dry_run:
+                terminal_text.insert(tk.END, "Dry run, no files will be changed:\n")
+                for file_info, _ in plan:
+                    if file_info.get('stash'):
+                        terminal_text.insert(tk.END, f"    [=] move {file_info['previous_filename']} out of the way to {file_info['filename']}\n")
+                    elif file_info['status'] == 'renamed':
+                        terminal_text.insert(tk.END, f"    [=] move {file_info['previous_filename']} -> {file_info['filename']}\n")
+                    elif file_info['status'] == 'removed':
+                        terminal_text.insert(tk.END, f"    [-] delete {file_info['filename']}\n")
+                    else:
+                        terminal_text.insert(tk.END, f"    [{'+' if file_info['status'] == 'added' else '~'}] download {file_info['filename']}\n")
+                scroll_terminal()
+                return
+
+            # Moves run one at a time and in order, since one can free up the path the next one moves to. The plan has
+            # one action per path, so none of them is skipped as done by a newer commit.
+            index_local_blobs(plan)
+            for file_info, commit_date in plan:
+                if file_info.get('stash'):
+                    stash_file(file_info)
+                elif file_info['status'] == 'renamed':
+                    finished_files_set.clear()
+                    process_file_info(file_info, commit_date)
+            finished_files_set.clear()
+
+            # Every path appears once in the plan, so downloads can run side by side, and then the deletes
+            download_start = time.monotonic()
+            bytes_before = downloaded_bytes[0]
+            for phase in ('download', 'delete'):
+                phase_plan = [(file_info, commit_date) for file_info, commit_date in plan
+                              if file_info['status'] != 'renamed' and (file_info['status'] == 'removed') == (phase == 'delete')]
+                with ThreadPoolExecutor(max_workers=sync_workers) as executor:
+                    futures = [executor.submit(process_file_info_in_worker, file_info, commit_date) for file_info, commit_date in phase_plan]
+                    for future in as_completed(futures):
+                        terminal_text.insert(tk.END, future.result())
+                        scroll_terminal()
+                if phase == 'download':
+                    record_throughput(downloaded_bytes[0] - bytes_before, time.monotonic() - download_start)
+
+
+        # Move a file that's in the way of a swap to its temporary name (or its disabled/prepended version, if that's
+        # the one on disk), where the next move picks it up
+        def stash_file(file_info):
+            old_file_path = os.path.join(local_path, os.path.relpath(file_info['previous_filename'], start=subdirectory))
+            temp_file_path = os.path.join(local_path, os.path.relpath(file_info['filename'], start=subdirectory))
+            final_file_path = os.path.join(local_path, os.path.relpath(file_info['destination'], start=subdirectory))
+
+            def dashed(path):
+                return os.path.join(os.path.dirname(path), '-' + os.path.basename(path))
+
+            for source, destination, final in ((old_file_path, temp_file_path, final_file_path),
+                                               (dashed(old_file_path), dashed(temp_file_path), dashed(final_file_path))):
+                if os.path.exists(source):
+                    try:
+                        # Journal it first, so a sync that gets cut off here doesn't lose the file
+                        with open(sync_journal_path, 'a', encoding='utf-8') as journal_file:
+                            journal_file.write(f"{destination}\t{source}\t{final}\n")
+                        os.replace(source, destination)
+                    except Exception as e:
+                        terminal_text.insert(tk.END, f"    ERROR moving {source} out of the way: {e}\n")
+                        scroll_terminal()
+                    return
+
+
+        # Preflight for the planned downloads that aren't on disk with the same content yet (going by the hashes the
+        # manifest remembers, so nothing is read), with their sizes from the Github tree
+        def print_plan_preflight(plan):
+            file_count = 0
+            byte_count = 0
+            sizes = {item['sha']: item.get('size', 0) for item in tree_data if item['type'] == 'blob'} if tree_data else {}
+            for file_info, _ in plan:
+                if file_info['status'] in ('removed', 'renamed'):
+                    continue
+                relative_path = os.path.relpath(file_info['filename'], start=subdirectory)
+                if relative_path.startswith('..') or 'user-customs' in relative_path:
+                    continue
+                file_path = os.path.join(local_path, relative_path)
+                dashed_path = os.path.join(os.path.dirname(file_path), '-' + os.path.basename(file_path))
+                if any(manifest.known_hash(path) == file_info.get('sha') for path in (file_path, dashed_path)):
+                    continue
+                file_count += 1
+                byte_count += sizes.get(file_info.get('sha'), 0)
+
+            if not sizes:
+                terminal_text.insert(tk.END, f"Preflight: up to {file_count} files to download (no sizes without the Github tree).\n\n")
+                scroll_terminal()
+                return
+            print_preflight(terminal_text, file_count, byte_count, get_free_bytes(local_path))
+            scroll_terminal()
+
+
+        # Find local files that already have the content of a planned download: files elsewhere in the textures
+        # folder with the same blob SHA in the Github tree (copied), and files the plan deletes (moved)
+        def index_local_blobs(plan):
+            wanted_shas = {file_info['sha'] for file_info, _ in plan if file_info['status'] != 'removed' and file_info.get('sha')}
+            if not wanted_shas:
+                return
+
+            def local_path_of(repo_path):
+                relative_path = os.path.relpath(repo_path, start=subdirectory)
+                if relative_path.startswith('..') or 'user-customs' in relative_path:
+                    return None
+                return os.path.join(local_path, relative_path)
+
+            wanted_sizes = None
+            if tree_data:
+                wanted_sizes = set()
+                for item in tree_data:
+                    if item['type'] == 'blob' and item['sha'] in wanted_shas:
+                        wanted_sizes.add(item.get('size'))
+                        candidate = local_path_of(tree_item_path(item, subdirectory))
+                        if candidate:
+                            # The tree says what it should hold; the index checks the file before using it
+                            local_blobs.add(candidate, sha=item['sha'])
+
+            for file_info, _ in plan:
+                if file_info['status'] == 'removed':
+                    candidate = local_path_of(file_info['filename'])
+                    # Only hash the ones that could match something
+                    if candidate and os.path.isfile(candidate) and (wanted_sizes is None or os.path.getsize(candidate) in wanted_sizes):
+                        local_blobs.add(candidate, movable=True)
+
+
+        # Run one planned action on a worker thread and hand back what it printed
+        def process_file_info_in_worker(file_info, commit_date):
+            terminal_text.start_buffer()
+            try:
+                process_file_info(file_info, commit_date)
+            except Exception as e:
+                terminal_text.insert(tk.END, f"    Failed to process {file_info['filename']}: {e}\n")
+            return terminal_text.end_buffer()
+
+
+        # Find the newest commit on the branch from before the last sync, to compare against
+        def get_base_commit_sha():
+            if not isinstance(last_run_date, datetime):
+                return None
+            until = last_run_date.strftime('%Y-%m-%dT%H:%M:%SZ')
+            base_url = f"https://api.github.com/repos/{repo_url}/commits?sha={branch_name}&until={until}&per_page=1"
+            response = cached_get(base_url, headers=headers, timeout=10)
+            if response.status_code != 200 or not response.json():
+                return None
+            return response.json()[0]['sha']
+
+
+        # Incremental sync: a single compare between the last synced commit and the branch returns the net
+        # file changes, instead of one request (plus pages) per commit. Returns False if the caller needs to
+        # fall back to walking the commits one by one.
+        def download_files_from_compare():
+            global counter_valid_commits  # Declare the global variable
+
+            # Anchor on the exact commit of the last sync, or the closest guess from the last sync date
+            base_sha = last_synced_sha or get_base_commit_sha()
+            if not base_sha:
+                terminal_text.insert(tk.END, "Could not find the commit from your last sync. Reviewing the commits one by one instead.\n")
+                scroll_terminal()
+                return False
+
+            compare_url = f"https://api.github.com/repos/{repo_url}/compare/{base_sha}...{branch_name}?per_page=100"
+            response = cached_get(compare_url, headers=headers, timeout=30)
+            # 404 = the base commit is gone (history rewritten), 422 = too big for Github to compare
+            if response.status_code != 200:
+                terminal_text.insert(tk.END, f"Could not compare with the commit from your last sync (Status Code: {response.status_code}). Reviewing the commits one by one instead.\n")
+                scroll_terminal()
+                return False
+
+            compare = response.json()
+            # If the branch no longer contains the base commit, the diff wouldn't undo what was dropped from it
+            if compare['status'] not in ('ahead', 'identical'):
+                terminal_text.insert(tk.END, f"The branch has been rewritten since your last sync ({compare['status']}). Reviewing the commits one by one instead.\n")
+                scroll_terminal()
+                return False
+
+            commits = compare['commits']
+            files_info = compare.get('files', [])
+            # The files list is capped per page, so a full page may mean some files were left out
+            truncated = len(files_info) >= 300
+            while 'next' in response.links and not truncated:
+                response = cached_get(response.links['next']['url'], headers=headers, timeout=30)
+                if response.status_code != 200:
+                    truncated = True
+                    break
+                page = response.json()
+                commits += page['commits']
+                files_info += page.get('files', [])
+                truncated = len(page.get('files', [])) >= 300
+            if truncated:
+                terminal_text.insert(tk.END, "Too many changes since your last sync to compare in one go. Reviewing the commits one by one instead.\n")
+                scroll_terminal()
+                return False
+
+            counter_valid_commits += compare['ahead_by']
+            if not commits:
+                terminal_text.insert(tk.END, "There is no new or modified content in Github since your last sync date.\n")
+                scroll_terminal()
+                return True
+
+            head_date = datetime.strptime(commits[-1]['commit']['author']['date'], '%Y-%m-%dT%H:%M:%SZ')
+            terminal_text.insert(tk.END, "\n")
+            terminal_text.insert(tk.END, f"****** GIT COMPARE ({base_sha[:7]}...{commits[-1]['sha'][:7]}): {compare['ahead_by']} COMMITS, {len(files_info)} FILES CHANGED ******\n")
+            scroll_terminal()
+
+            apply_plan(plan_net_changes([(head_date, file_info) for file_info in files_info]))
+            return True
+
+
+        if user_choice != 'full_scan':
+            try:
+                if download_files_from_compare():
+                    scroll_terminal()
+                    return
+            except RequestException as e:
+                terminal_text.insert(tk.END, f"Compare request failed ({e}). Reviewing the commits one by one instead.\n")
+                scroll_terminal()
+
+
+        # File changes of every reviewed commit, newest commit first, planned and applied once the walk is done
+        commit_events = []
+
         while api_url:
 
             terminal_text.after(100)
 
-            response = requests.get(api_url, headers=headers)
+            response = cached_get(api_url, headers=headers)
 
             if response.status_code == 200:
                 commits = response.json()
                 
 
+                reached_last_sync = False
+
                 for commit in commits:
                     commit_date = datetime.strptime(commit['commit']['author']['date'], '%Y-%m-%dT%H:%M:%SZ')
                     commit_hash = commit['sha'][:7]
+                    # The committer date is when the commit landed on the branch (what 'since' filters on). The
+                    # author date can be much older for rebased or cherry-picked commits.
+                    committed_date = datetime.strptime(commit['commit']['committer']['date'], '%Y-%m-%dT%H:%M:%SZ')
 
-                    if user_choice == 'full_scan' or commit_date > last_run_date:
+                    # Commits come newest first, so everything from here on was already synced
+                    if user_choice != 'full_scan' and (commit['sha'] == last_synced_sha or committed_date <= last_run_date):
+                        reached_last_sync = True
+                        break
+
+                    if user_choice == 'full_scan' or committed_date > last_run_date:
                         counter_valid_commits += 1
                         terminal_text.insert(tk.END, "\n")
                         terminal_text.insert(tk.END, f"****** GIT COMMIT ({commit_hash}) DATE: {commit_date} ******\n")
                         scroll_terminal()
                         commit_sha = commit['sha']
                         files_url = f"https://api.github.com/repos/{repo_url}/commits/{commit_sha}?path={subdirectory}&sha={branch_name}"
-                        files_response = requests.get(files_url, headers=headers)
 
                         try:
-                            files_response = requests.get(files_url, headers=headers, timeout=10)  # Adding a timeout value
+                            files_response = cached_get(files_url, headers=headers, timeout=10)  # Adding a timeout value
 
 
                             if files_response.status_code == 200:
@@ -211,514 +1203,10 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
 
                                 while 'next' in files_response.links:
                                     next_page_url = files_response.links['next']['url']
-                                    files_response = requests.get(next_page_url, headers=headers)
+                                    files_response = cached_get(next_page_url, headers=headers)
                                     files_info += files_response.json()['files']
 
-                                for file_info in files_info:
-                                    file_status = file_info.get('status')  # New, modified, or deleted
-                                    file_sha = file_info.get('sha')  # hash
-
-                                    if debug_mode == 'True':
-                                        terminal_text.insert(tk.END, f"======== NEXT FILE ==============\n")
-                                        self.terminal_text.yview(tk.END) 
-                                        terminal_text.see(tk.END)
-                                    
-                                    # Get the URL to the item
-                                    file_url = file_info.get('raw_url')
-                                    # Get the name of the file or folder
-                                    file_or_folder_name = os.path.basename(file_info['filename'])
-                                    # Build the relative path
-                                    relative_path = os.path.relpath(file_info['filename'], start=subdirectory)
-
-                                    # Ignore git and certain (but not all) hidden files and folders
-                                    if file_or_folder_name.startswith(('.git', '.DS', '._')):
-                                        starter_line(file_status, relative_path)
-                                        terminal_text.insert(tk.END, f"    Skipping hidden file or directory.\n")
-                                        scroll_terminal()
-                                        continue
-
-                                    if 'user-customs' in relative_path:
-                                        starter_line(file_status, relative_path)
-                                        terminal_text.insert(tk.END, f"    Skipping file with 'user-customs' in its path.\n")
-                                        scroll_terminal()
-                                        continue
-
-                                    # Check if the file is outside the specified subdirectory but only if the status wasn't "modified" (handle that later)
-                                    if file_status != 'renamed':
-                                        if debug_mode == 'True':
-                                            terminal_text.insert(tk.END, "    Checking if outside of specified directory by seeing if relative_path starts with '..'.\n")
-                                            terminal_text.insert(tk.END, f"    relative_path: {relative_path}\n")
-                                            scroll_terminal()
-                                        if relative_path.startswith('..') or os.path.isabs(relative_path):
-                                            if debug_mode == 'True':
-                                                starter_line(file_status, relative_path)
-                                                terminal_text.insert(tk.END, f"    Outside of specified subdirectory. Skipping file: {file_info['filename']}\n")
-                                                scroll_terminal()
-                                            else:
-                                                starter_line(file_status, relative_path)
-                                                terminal_text.insert(tk.END, f"    Skipping download because outside of specified subdirectory.\n")
-                                                scroll_terminal()
-                                            continue
-                                    
-                                    # Build the local absolute path
-                                    file_path = os.path.join(local_path, relative_path)
-                                    if debug_mode == 'True':
-                                        terminal_text.insert(tk.END, f"    file_path: {file_path}\n")
-
-
-
-                                    # Common for ADDED or MODIFIED or RENAMED
-                                    if file_status == 'added' or file_status == 'modified' or file_status == 'renamed':
-
-                                        # Check if the file is has already been processed
-                                        if debug_mode == 'True':
-                                            terminal_text.insert(tk.END, f"    Checking if in finished_files_set before running hash tests.\n")
-                                        if file_path not in finished_files_set:
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, f"    Not in finished_files_set.\n")
-                                            if os.path.exists(file_path):
-                                                # Compute the local hash
-                                                if debug_mode == True:
-                                                    terminal_text.insert(tk.END, f"\n  Hash check file path: {file_path}\n")
-                                                local_file_hash = compute_local_file_hash(file_path, debug_mode)
-                                                # Compare local hash to github file hash
-                                                if debug_mode == True:
-                                                    terminal_text.insert(tk.END, f"  Comparing hashes for: {file_path}\n")  
-                                                hash_comparison = compare_hashes(local_file_hash, file_sha, file_path, debug_mode)
-                                            
-                                            # Check for prepended version and use that unless there is also the normal/non-prepended version
-                                            else:
-                                                if debug_mode == 'True':
-                                                    terminal_text.insert(tk.END, "    LOCAL PATH DOESN'T EXIST. Checking if there is a disabled/prepended version.\n")
-                                                    # Split the path into directory and filename
-                                                directory, filename = os.path.split(file_path)
-                                                # Add a dash before the final segment (filename or folder)
-                                                modified_filename = '-' + filename
-                                                # Join the directory and modified filename to get the new path
-                                                file_path_prepended = os.path.join(directory, modified_filename)
-                                                # Check if disabled/prepended version exists
-                                                if os.path.exists(file_path_prepended):
-                                                    # Redefine file_path to prepended name
-                                                    if debug_mode == 'True':
-                                                        terminal_text.insert(tk.END, f"    It exists. Modifying path for hash comparison to: {file_path_prepended}\n")
-                                                    # Compute the local hash
-                                                    if debug_mode == True:
-                                                        terminal_text.insert(tk.END, f"  Hash check file path: {file_path}\n")
-                                                    local_file_hash = compute_local_file_hash(file_path_prepended, debug_mode)
-                                                    if debug_mode == 'True':
-                                                        terminal_text.insert(tk.END, f"    Computed hash for file_path_prepended is {local_file_hash}\n")
-                                                    # Compare local hash to github file hash
-                                                    if debug_mode == True:
-                                                        terminal_text.insert(tk.END, f"  Comparing hashes for: {file_path}\n")  
-                                                    hash_comparison = compare_hashes(local_file_hash, file_sha, file_path, debug_mode)
-                                                    if debug_mode == 'True':
-                                                        terminal_text.insert(tk.END, f"    Is remote has same as file_path_prepended: {hash_comparison}\n")
-                                                else:
-                                                    if debug_mode == 'True':
-                                                        terminal_text.insert(tk.END, f"    Disabled/prepended file doesn't exist: {file_path}\n")
-                                                    hash_comparison = False
-                                            scroll_terminal()
-                                        else:
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, f"    In finished_files_set. Skipping hash tests.\n")
-                                                scroll_terminal()
-
-
-                                        # Detailed output for debug mode
-                                        if debug_mode == 'True':
-                                            # terminal_text.insert(tk.END, f"- {file_status} File: {file_info['filename']}, Relative Path: {relative_path}\n")
-                                            starter_line(file_status, relative_path)
-                                            terminal_text.insert(tk.END, f"    Remote hash: {file_sha}\n")
-                                            scroll_terminal()
-                                            # initialize variable
-                                            local_file_hash = "" 
-                                            if local_file_hash:
-                                                terminal_text.insert(tk.END, f"    Local_file_hash exists as {local_file_hash}.\n")
-                                                if hash_comparison == True:
-                                                    terminal_text.insert(tk.END, f"    Local hash: {local_file_hash}\n")
-                                                    terminal_text.insert(tk.END, "    HASHES ARE SAME.\n")
-                                                    scroll_terminal()
-                                                else:
-                                                    terminal_text.insert(tk.END, f"    Local hash: {local_file_hash}\n")
-                                                    terminal_text.insert(tk.END, "    DIFFERENT HASHES.\n")
-                                                    scroll_terminal()
-
-                                            sys.stdout.flush()
-                                        # Normal output
-                                        else:
-                                            starter_line(file_status, relative_path)
-                                    
-                                    
-                                    # ADDED or MODIFIED
-                                    if file_status == 'added' or file_status == 'modified':
-
-                                        # Check if the file is has already been processed
-                                        if debug_mode == 'True':
-                                            terminal_text.insert(tk.END, f"    Checking if in finished_files_set.\n")
-                                            scroll_terminal()
-                                        if file_path in finished_files_set:
-                                            terminal_text.insert(tk.END, f"    Skipping because already processed in a newer commit.\n")
-                                            scroll_terminal()
-                                            continue
-                                        else:
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, f"    Not in finished_files_set.\n")
-                                              
-                                        if file_status == 'added':
-                                            if not os.path.exists(file_path) or not hash_comparison:
-                                                counter_files_downloaded = download_file(file_url, file_path, counter_files_downloaded, commit_date, debug_mode, hash_comparison)
-                                            else:
-                                                terminal_text.insert(tk.END, f"    Skipping download because file exists and matches github file.\n")
-                                            # Add to finished file set to skip processing in older commits
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, f"    Adding to the finished_files_set.\n")
-                                            add_to_finished_files_set(file_path, debug_mode)   
-                                            scroll_terminal()
-                                            continue  
-                                            
-                                          
-                                        if file_status == 'modified':
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, f"    Check if hash is different before downloading: {file_path}\n")  # Debugging output
-                                                scroll_terminal()
-                                            if not os.path.exists(file_path) or not hash_comparison:
-                                                # Download the file (or prepended file) and update the counter
-                                                counter_files_downloaded = download_file(file_url, file_path, counter_files_downloaded, commit_date, debug_mode, hash_comparison)
-                                            else:
-                                                terminal_text.insert(tk.END, f"    Skipping download because files are identical.\n")
-                                                scroll_terminal()
-                                            # Add to finished file set to skip processing in older commits
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, f"    Adding to the finished_files_set.\n")
-                                                scroll_terminal()
-                                            add_to_finished_files_set(file_path, debug_mode)   
-                                            scroll_terminal()
-                                            continue  
-                                            
-                                    elif file_status == 'renamed':
-                                        old_file_relative_path = os.path.relpath(file_info['previous_filename'], start=subdirectory)
-                                        old_file_path = os.path.join(local_path, old_file_relative_path)
-                                        new_file_path = file_path
-                                        new_file_dir = os.path.dirname(new_file_path)
-
-                                        # Info on what happened in the commit
-                                        if debug_mode == 'True':
-                                            terminal_text.insert(tk.END, f"    In commit, {old_file_relative_path} renamed to {relative_path}.\n")
-                                            scroll_terminal()
-                                        
-                                        try:
-
-                                            # Check if the file is has already been processed
-                                            if file_path in finished_files_set:
-                                                # Add the old name if it's not already in the set
-                                                terminal_text.insert(tk.END, f"    Skipping because new or old path already processed in a newer commit.\n")
-                                                scroll_terminal()
-                                                if debug_mode == 'True':
-                                                        terminal_text.insert(tk.END, f"    Adding old path to the finished_files_set. New path was already there.\n")
-                                                        scroll_terminal()
-                                                add_to_finished_files_set(old_file_path)  
-                                                scroll_terminal()
-                                                continue 
-
-                                            # Check if activity was all outside of the subdirectory and skip to next file if so
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, "    Checking if all activity was outside of specified directory by seeing if relative_paths both start with '..'.\n")
-                                                terminal_text.insert(tk.END, f"    New path: {relative_path}\n")
-                                                terminal_text.insert(tk.END, f"    Old Path: {old_file_relative_path}\n")
-                                                scroll_terminal()
-                                            # Checking both old and new file names 
-                                            if relative_path.startswith('..') or os.path.isabs(relative_path):
-                                                if old_file_relative_path.startswith('..') or os.path.isabs(old_file_relative_path):
-                                                    terminal_text.insert(tk.END, f"    Old name and new name outside of specified subdirectory. Skipping file.\n")
-                                                    scroll_terminal()
-                                                    continue
-                                            else:
-                                                if debug_mode == 'True':
-                                                    terminal_text.insert(tk.END, "    One or both of the old/new filenames are inside the specified subdirectory. Proceeding...\n")
-
-
-                                            # Check if new file name is outside of the subdirectory, and if so, just delete the local file instead of moving it
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, "    Checking if the new/desination file name is outside of the specified subdirectory by seeing if its relative path starts with '..'.\n")
-                                                terminal_text.insert(tk.END, f"    New path: {relative_path}\n")
-                                                scroll_terminal()
-                                            # Checking new file name
-                                            if relative_path.startswith('..') or os.path.isabs(relative_path):
-                                                if debug_mode:
-                                                    terminal_text.insert(tk.END, f"    New name is outside of specified directory. Looking for the old file...\n")
-                                                # terminal_text.update_idletasks()
-                                                # terminal_text.after(100)
-                                                # Check if old file exists
-                                                if os.path.exists(old_file_path):
-                                                    if debug_mode:
-                                                        terminal_text.insert(tk.END, f"    Found the old name file Deleting...\n")
-                                                    os.remove(old_file_path)
-                                                    counter_files_deleted += 1
-                                                    terminal_text.insert(tk.END, f"    Deleted {file_info['previous_filename']}\n")
-                                                else:
-                                                    terminal_text.insert(tk.END, f"    File has already been deleted locally.\n")
-                                                    terminal_text.yview(tk.END) 
-                                                    terminal_text.see(tk.END)
-                                                if debug_mode == 'True':
-                                                    terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
-                                                add_to_finished_files_set(old_file_path)  
-                                                add_to_finished_files_set(new_file_path)  
-
-                                                # terminal_text.update_idletasks()
-                                                # terminal_text.after(100)
-                                                continue
-
-
-                                            # Check if new old name is outside of the subdirectory, and if so, download the new name file
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, "    Checking if the old file name is outside of the specified subdirectory by seeing if its relative path starts with '..'.\n")
-                                                terminal_text.insert(tk.END, f"    Old path: {old_file_path}\n")
-                                                scroll_terminal()
-                                            # Checking new file name
-                                            if old_file_relative_path.startswith('..') or os.path.isabs(old_file_relative_path):
-                                                if debug_mode:
-                                                    terminal_text.insert(tk.END, f"    Old name is outside of specified directory. Downloading the new file.\n")
-                                                if debug_mode == 'True':
-                                                    terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
-                                                add_to_finished_files_set(old_file_path)  
-                                                add_to_finished_files_set(new_file_path)  
-                                                counter_files_downloaded = download_file(file_url, file_path, counter_files_downloaded, commit_date, debug_mode, hash_comparison)
-                                                scroll_terminal()
-
-                                                terminal_text.update_idletasks()
-                                                terminal_text.after(100)
-                                                continue
-
-                                            # Check for the old filename to see if the file exists
-                                            if os.path.exists(old_file_path):
-                                                # File with the old name exists, compute the hash and compare it with the GitHub file hash
-
-                                                # Compute the local hash
-                                                if debug_mode == True:
-                                                    terminal_text.insert(tk.END, f"\n  Hash check for old file path: {old_file_path}\n")
-                                                local_file_hash = compute_local_file_hash(old_file_path, debug_mode)
-
-                                                # Compare local hash to GitHub file hash
-                                                if debug_mode == True:
-                                                    terminal_text.insert(tk.END, f"  Comparing hashes for: {old_file_path}\n")
-                                                hash_comparison = compare_hashes(local_file_hash, file_sha, old_file_path, debug_mode)
-
-                                                if hash_comparison:
-                                                    # Hashes match, proceed with renaming the file
-                                                    terminal_text.insert(tk.END, f"    Hashes match. Proceeding with renaming the file.\n")
-                                                else:
-                                                    # Hashes don't match, download the file
-                                                    terminal_text.insert(tk.END, f"    Hashes don't match. Downloading the correct version of the file.\n")
-                                                    counter_files_downloaded = download_file(file_url, old_file_path, counter_files_downloaded, commit_date, debug_mode, hash_comparison)
-
-                                                # Create directory if needed
-                                                if not os.path.exists(new_file_dir):
-                                                    try:
-                                                        os.makedirs(new_file_dir)
-                                                        # terminal_text.insert(tk.END, f"    Created missing directories: {new_file_dir}\n")
-                                                        scroll_terminal()
-                                                    except Exception as e:
-                                                        terminal_text.insert(tk.END, f"    ERROR creating directories: {e}\n")
-                                                        terminal_text.insert(tk.END, traceback.format_exc())
-                                                        scroll_terminal()
-                                                        continue
-
-                                                # Rename the file
-                                                os.rename(old_file_path, new_file_path)
-                                                if debug_mode == 'True':
-                                                    terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
-                                                add_to_finished_files_set(old_file_path)
-                                                add_to_finished_files_set(new_file_path)
-                                                terminal_text.insert(tk.END, f"    Renamed: {file_info['previous_filename']} to {relative_path}\n")
-                                                scroll_terminal()
-
-                                                continue
-
-                                            
-
-                                            # Check for a disabled/prepended version of the old filename
-                                            directory, filename = os.path.split(old_file_path)
-                                            # Add a dash before the final segment (filename or folder)
-                                            modified_old_filename = '-' + filename
-                                            # Join the directory and modified filename to get the new path
-                                            old_file_path_prepended = os.path.join(directory, modified_old_filename)
-                                            
-                                            # terminal_text.insert(tk.END, f"    Checking if prepended version of old file exists at {old_file_path_prepended}...\n")
-
-                                            # Check if disabled/prepended version exists
-                                            if os.path.exists(old_file_path_prepended):
-                                            
-                                                # Compute the local hash
-                                                if debug_mode == True:
-                                                    terminal_text.insert(tk.END, f"\n  Hash check for prepended file path: {old_file_path_prepended}\n")
-                                                local_file_hash = compute_local_file_hash(old_file_path_prepended, debug_mode)
-
-                                                # Compare local hash to GitHub file hash
-                                                if debug_mode == True:
-                                                    terminal_text.insert(tk.END, f"  Comparing hashes for: {old_file_path_prepended}\n")
-                                                hash_comparison = compare_hashes(local_file_hash, file_sha, old_file_path_prepended, debug_mode)
-
-                                                if hash_comparison:
-                                                    # Hashes match, proceed with renaming the file
-                                                    terminal_text.insert(tk.END, f"    Hashes match. Proceeding with renaming the prepended file.\n")
-                                                else:
-                                                    # Hashes don't match, download the file
-                                                    terminal_text.insert(tk.END, f"    Hashes don't match. Downloading the correct version of the file.\n")
-                                                    counter_files_downloaded = download_file(file_url, old_file_path_prepended, counter_files_downloaded, commit_date, debug_mode, hash_comparison)
-                                                
-                                                # Ensure the destination directory exists
-                                                new_file_dir = os.path.dirname(new_file_path)
-                                                if not os.path.exists(new_file_dir):
-                                                    try:
-                                                        os.makedirs(new_file_dir)
-                                                        # terminal_text.insert(tk.END, f"    Created missing directories: {new_file_dir}\n")
-                                                        scroll_terminal()
-                                                    except Exception as e:
-                                                        terminal_text.insert(tk.END, f"    ERROR creating directories: {e}\n")
-                                                        terminal_text.insert(tk.END, traceback.format_exc())
-                                                        scroll_terminal()
-                                                        continue
-                                                
-                                                # Disabled/prepended file with the old name exists, rename it to the new name
-                                                if debug_mode == 'True':
-                                                    terminal_text.insert(tk.END, f"    Old file name doesn't exist, but a disabled/prepended file with the old name exists. Renaming it to the new name.\n")
-                                                    # terminal_text.insert(tk.END, f"    From: {old_file_path_prepended}\n")
-                                                    # terminal_text.insert(tk.END, f"    To: {new_file_path}\n")
-                                                    scroll_terminal()
-
-                                                # Create a path and name for the new prepended file location
-                                                directory_new, filename_new = os.path.split(new_file_path)
-                                                # Add a dash before the final segment (filename or folder)
-                                                modified_new_filename = '-' + filename_new
-                                                # Join the directory and modified filename to get the new path
-                                                new_file_path_prepended = os.path.join(directory_new, modified_new_filename)
-                                                    
-                                                try:
-                                                    os.rename(old_file_path_prepended, new_file_path_prepended)
-                                                    if debug_mode == 'True':
-                                                        terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
-                                                    add_to_finished_files_set(old_file_path)  
-                                                    add_to_finished_files_set(new_file_path)  
-                                                    terminal_text.insert(tk.END, f"    Renamed: {modified_old_filename} version of to {relative_path}\n")
-                                                    scroll_terminal()
-                                                except Exception as e:
-                                                    terminal_text.insert(tk.END, f"    ERROR in renaming file: {e}\n")
-                                                    terminal_text.insert(tk.END, traceback.format_exc())  # Logs the traceback
-                                                    scroll_terminal()
-                                                    continue
-                                                
-                                            # Check for the new filename to see if file exists and if it is current
-                                            elif os.path.exists(new_file_path):
-                                                if not hash_comparison:
-                                                    # Download the file and update the counter
-                                                    terminal_text.insert(tk.END, f"    Downloading because the version of new file on github is newer.\n")
-                                                    counter_files_downloaded = download_file(file_url, file_path, counter_files_downloaded, commit_date, debug_mode, hash_comparison)
-                                                    if debug_mode == 'True':
-                                                        terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
-                                                    add_to_finished_files_set(old_file_path)  
-                                                    add_to_finished_files_set(new_file_path)  
-                                                else:
-                                                    # File with the new name already exists
-                                                    if debug_mode == 'True':
-                                                        terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
-                                                    add_to_finished_files_set(old_file_path)  
-                                                    add_to_finished_files_set(new_file_path)  
-                                                    terminal_text.insert(tk.END, f"    Skipping download because already exists with the new name and is current.\n")
-                                                scroll_terminal()
-                                                continue
-                                            
-                                            else:
-                                                # Download the file  and update the counter
-                                                if debug_mode == 'True':
-                                                    terminal_text.insert(tk.END, f"    Adding old and new path to the finished_files_set..\n")
-                                                add_to_finished_files_set(old_file_path)  
-                                                add_to_finished_files_set(new_file_path)  
-                                                if debug_mode == 'True':
-                                                    terminal_text.insert(tk.END, f"    Downloading because neither the new or old path exist.\n")
-                                                # Proceed to download logic
-                                                counter_files_downloaded = download_file(file_url, file_path, counter_files_downloaded, commit_date, debug_mode, hash_comparison)
-                                                scroll_terminal()
-
-                                        except Exception as e:
-                                            terminal_text.insert(tk.END, f"    ERROR processing renamed file: {e}\n")
-                                            scroll_terminal()
-
-                                        # terminal_text.update_idletasks()
-                                        # terminal_text.after(100)
-                                        continue  
-
-                                    elif file_status == 'removed':
-                                        
-                                        starter_line(file_status, relative_path)
-
-                                        # # Check if the file is outside the specified subdirectory
-                                        # if debug_mode == 'True':
-                                        #     terminal_text.insert(tk.END, "    Checking if outside of specified directory by seeing if relative_path starts with '..'.\n")
-                                        #     terminal_text.insert(tk.END, f"    relative_path: {relative_path}")
-                                        # if relative_path.startswith('..') or os.path.isabs(relative_path):
-                                        #     if debug_mode == 'True':
-                                        #         terminal_text.insert(tk.END, f"    Outside of specified subdirectory. Skipping file: {file_info['filename']}")
-                                        #     else:
-                                        #         terminal_text.insert(tk.END, f"    Skipping because outside of specified subdirectory.\n")
-                                        #     scroll_terminal()
-                                        #     continue
-
-                                        # Check if the file is has already been processed
-                                        if file_path in finished_files_set:
-                                            terminal_text.insert(tk.END, f"    Skipping because already processed in a newer commit.\n")
-                                            scroll_terminal()
-                                            continue
-                                        
-                                        # Add to finished file set to skip processing in older commits
-                                        if debug_mode == 'True':
-                                            terminal_text.insert(tk.END, f"    Adding deleted path to the finished_files_set.\n")
-                                        add_to_finished_files_set(file_path, debug_mode)
-
-                                        # If passed all of those checks, check if the file exists, and if so, delete it.
-                                        if os.path.exists(file_path):
-                                            os.remove(file_path)
-                                            counter_files_deleted += 1
-                                            if debug_mode:
-                                                terminal_text.insert(tk.END, f"    Deleted {file_info['filename']} from {relative_path}\n")
-                                            else:
-                                                terminal_text.insert(tk.END, f"    Deleted {relative_path}\n")
-                                        else:
-                                            if debug_mode == 'True':
-                                                terminal_text.insert(tk.END, "    LOCAL PATH DOESN'T EXIST. Checking if there is a disabled/prepended version.\n")
-                                                scroll_terminal()
-                                                # Split the path into directory and filename
-                                            directory, filename = os.path.split(file_path)
-                                            # Add a dash before the final segment (filename or folder)
-                                            modified_filename = '-' + filename
-                                            # Join the directory and modified filename to get the new path
-                                            file_path_prepended = os.path.join(directory, modified_filename)
-                                            # Check if disabled/prepended version exists
-                                            if os.path.exists(file_path_prepended):
-                                                if debug_mode == 'True':
-                                                    terminal_text.insert(tk.END, f"    Prepended version exists at: {file_path_prepended}\n")
-                                                    scroll_terminal()
-                                                # Delete the prepended version
-                                                os.remove(file_path_prepended)
-                                                counter_files_deleted += 1
-                                                terminal_text.insert(tk.END, f"    Deleted disabled/prepended version because normal named version doesn't exist. \n")
-                                                scroll_terminal()
-                                            else:
-                                                terminal_text.insert(tk.END, f"    File has already been deleted from local.\n")
-                                                scroll_terminal()
-
-
-                                        # scroll_terminal()
-                                        # terminal_text.update_idletasks()
-                                        # terminal_text.after(100)
-                                        continue
-
-                                    
-                                    else:
-                                        terminal_text.insert(tk.END, f"Unknown file status: {file_status}\n")
-                                        scroll_terminal()
-                                
-                                # Add to finished file set to skip processing in older commits
-                                # add_to_finished_files_set(file_path, debug_mode)
+                                commit_events.append((commit_date, files_info))
 
 
                             else:
@@ -758,9 +1246,15 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
             # Check for pagination information in the response headers
             link_header = response.headers.get('Link')
             api_url = get_next_page_url(link_header)
+            if response.status_code == 200 and reached_last_sync:
+                api_url = None
 
 
-        
+        # Collapse the whole history into one action per path before touching any files
+        events = [(commit_date, file_info) for commit_date, files_info in reversed(commit_events) for file_info in files_info]
+        if events:
+            apply_plan(plan_net_changes(events))
+
         # terminal_text.insert(tk.END, finished_files_set)
         scroll_terminal()
 
@@ -789,7 +1283,7 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
         while api_url:
             terminal_text.insert(tk.END, f"Fetching: {api_url}\n")  # Print the API URL being fetched
             scroll_terminal()
-            response = requests.get(api_url, headers=headers)
+            response = cached_get(api_url, headers=headers)
 
             if response.status_code == 200:
                 files = response.json()
@@ -809,7 +1303,7 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
 
                         if not os.path.exists(file_path) or not hash_comparison:
                             # Download the file (or prepended file) and update the counter
-                            counter_files_downloaded = download_file(file_url, file_path, counter_files_downloaded, commit_date, debug_mode, hash_comparison)
+                            download_file(file_url, file_path, commit_date, debug_mode, hash_comparison)
                         else:
                             terminal_text.insert(tk.END, f"Skipping existing file: {file['path']}\n")
                             scroll_terminal()
@@ -879,7 +1373,20 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
 
     # Check for new files and download
     try:
-        terminal_text.insert(tk.END, f"Checking for new or modified files since last run date ({last_run_date})...\n")
+        if not args.dry_run:
+            # Only a sync that was cut off leaves a journal (and files to clean up) behind
+            if os.path.exists(sync_journal_path):
+                restored, removed_partials = recover_interrupted_sync(os.path.join(local_directory, slus_folder))
+                terminal_text.insert(tk.END, f"The last sync didn't finish: put back {restored} files it had moved out of the way and removed {removed_partials} unfinished temporary files.\n\n")
+                scroll_terminal()
+            open(sync_journal_path, 'w', encoding='utf-8').close()
+        head_sha, head_tree = get_branch_head()
+        if user_choice == 'verify':
+            terminal_text.insert(tk.END, "Verifying every texture against its hash in Github...\n")
+        elif last_synced_sha:
+            terminal_text.insert(tk.END, f"Checking for new or modified files since the last synced commit ({last_synced_sha[:7]})...\n")
+        else:
+            terminal_text.insert(tk.END, f"Checking for new or modified files since last run date ({last_run_date})...\n")
         terminal_text.insert(tk.END, "\n")
         scroll_terminal()
         # debug_mode_variable_type = type(debug_mode)
@@ -887,7 +1394,18 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
         if debug_mode == True or debug_mode == "True":
           terminal_text.insert(tk.END, "Debug mode is on. Output will be verbose.\n\n")
           scroll_terminal()
-        download_files(github_repo_url, local_directory, branch_name, subdirectory, debug_mode)
+        # Check the content of every local file instead of reviewing the changes
+        if user_choice == 'verify':
+            if load_tree_data():
+                verify_local_files(tree_data, terminal_text, args.dry_run)
+            else:
+                terminal_text.insert(tk.END, "ERROR: Can't verify your textures without the Github tree. Try again later.\n")
+        # Nothing to review if Github is still on the commit (or the exact same files) the last sync finished with
+        elif user_choice != 'full_scan' and last_synced_sha and head_sha and (head_sha == last_synced_sha or head_tree == last_synced_tree):
+            terminal_text.insert(tk.END, f"Github hasn't changed since your last sync (commit {head_sha[:7]}). Nothing to download.\n")
+            scroll_terminal()
+        else:
+            download_files(github_repo_url, local_directory, branch_name, subdirectory, debug_mode)
         terminal_text.insert(tk.END, "\n")
         scroll_terminal()
         # Check the rate limits again to see usage (limit resets every hour at top of hour)
@@ -902,18 +1420,22 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
         terminal_text.insert(tk.END, f"{counter_files_deleted} files deleted.\n")
         terminal_text.insert(tk.END, "\n")
         scroll_terminal()
-        # Call the function to delete empty folders after syncing files
-        remove_empty_folders(local_directory, debug_mode=False)
-        terminal_text.insert(tk.END, "\n")  # Add a line break 
-        terminal_text.insert(tk.END, "#                                                                   #\n")
-        terminal_text.insert(tk.END, "#     Finished reviewing all changes in specified time period.      #\n")
-        terminal_text.insert(tk.END, "#           Comparing directory structure to Github...              #\n")
-        terminal_text.insert(tk.END, "#-------------------------------------------------------------------#\n")
-        terminal_text.insert(tk.END, "\n")
-        scroll_terminal()
+        # Call the function to delete empty folders after syncing files (a verify only replaces files that don't match,
+        # and a dry run changes nothing)
+        if user_choice != 'verify' and not args.dry_run:
+            remove_empty_folders(local_directory, debug_mode=False)
+            terminal_text.insert(tk.END, "\n")  # Add a line break 
+            terminal_text.insert(tk.END, "#                                                                   #\n")
+            terminal_text.insert(tk.END, "#     Finished reviewing all changes in specified time period.      #\n")
+            terminal_text.insert(tk.END, "#           Comparing directory structure to Github...              #\n")
+            terminal_text.insert(tk.END, "#-------------------------------------------------------------------#\n")
+            terminal_text.insert(tk.END, "\n")
+            scroll_terminal()
 
-        # Save the current run date to the config file
-        write_last_run_date()
+        # Save the current run date to the config file (a dry run changed nothing, so the next sync has to do it all
+        # again, and a verify didn't review the changes since the last sync)
+        if not args.dry_run and user_choice != 'verify':
+            write_last_run_date()
 
     except Exception as e:
         terminal_text.insert(tk.END, "\n")
@@ -921,28 +1443,36 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
         terminal_text.insert(tk.END, "\n")
         scroll_terminal()
 
-    terminal_text.insert(tk.END, "\n")  # Add a line break 
-    terminal_text.insert(tk.END, "#-------------------------------------------------------------------#\n")
-    terminal_text.insert(tk.END, "#                                                                   #\n")
-    terminal_text.insert(tk.END, "#                      Starting Health Check                        #\n")
-    terminal_text.insert(tk.END, "#                                                                   #\n")
-    terminal_text.insert(tk.END, "#    Looking for extraneous textures and duplicate filenames...     #\n")
-    terminal_text.insert(tk.END, "\n")
-    scroll_terminal()
+    # The health check deletes and downloads files, which a verify or a dry run promises not to do
+    if user_choice == 'verify':
+        terminal_text.insert(tk.END, "Health check skipped: Verify only replaces files that don't match Github.\n\n")
+        scroll_terminal()
+    elif args.dry_run:
+        terminal_text.insert(tk.END, "Health check skipped: Dry run, no files are changed.\n\n")
+        scroll_terminal()
+    else:
+        terminal_text.insert(tk.END, "\n")  # Add a line break 
+        terminal_text.insert(tk.END, "#-------------------------------------------------------------------#\n")
+        terminal_text.insert(tk.END, "#                                                                   #\n")
+        terminal_text.insert(tk.END, "#                      Starting Health Check                        #\n")
+        terminal_text.insert(tk.END, "#                                                                   #\n")
+        terminal_text.insert(tk.END, "#    Looking for extraneous textures and duplicate filenames...     #\n")
+        terminal_text.insert(tk.END, "\n")
+        scroll_terminal()
 
-    # Run fullscan to compare directory trees and offer to delete and/or download files
-    run_scan_and_print_output(terminal_text)
-    scroll_terminal()
+        # Run fullscan to compare directory trees and offer to delete and/or download files
+        run_scan_and_print_output(terminal_text)
+        scroll_terminal()
 
-    if debug_mode == 'True':
-        # Check for duplicate texture names across the entire replacements folder
-        replacements_path = os.path.join(local_directory, slus_folder, "replacements")
-        check_for_dupes(replacements_path)
+        if debug_mode == 'True':
+            # Check for duplicate texture names across the entire replacements folder
+            replacements_path = os.path.join(local_directory, slus_folder, "replacements")
+            check_for_dupes(replacements_path)
 
-    terminal_text.insert(tk.END, "#                                                                   #\n")
-    terminal_text.insert(tk.END, "#                      Finished Health Check                        #\n")
-    terminal_text.insert(tk.END, "#-------------------------------------------------------------------#\n")
-    scroll_terminal()
+        terminal_text.insert(tk.END, "#                                                                   #\n")
+        terminal_text.insert(tk.END, "#                      Finished Health Check                        #\n")
+        terminal_text.insert(tk.END, "#-------------------------------------------------------------------#\n")
+        scroll_terminal()
 
     # Check the rate limits (limit resets every hour at top of hour)
     limits = check_rate_limits(github_token)
@@ -984,7 +1514,14 @@ def main_sync(user_choice, terminal_text, github_token, last_run_date):
     terminal_text.insert(tk.END, f"\n--- SYNC SUMMARY ---\n")
     terminal_text.insert(tk.END, f"{counter_files_downloaded} files downloaded in the Git commits review.\n")
     terminal_text.insert(tk.END, f"{counter_files_deleted} files deleted in the Git commits review.\n")
-    terminal_text.insert(tk.END, f"  * These numbers do not include the final health check popups numbers, if any.\n\n")
+    terminal_text.insert(tk.END, f"  * These numbers do not include the final health check popups numbers, if any.\n")
+    cache_stats = get_cache_stats()
+    # Keep the hashes learned during this sync for the next one
+    manifest.flush()
+    # Finished, nothing to clean up next time
+    if os.path.exists(sync_journal_path):
+        os.remove(sync_journal_path)
+    terminal_text.insert(tk.END, f"{cache_stats['hits']} Github API responses were unchanged and came from the local cache, {cache_stats['misses']} were fetched.\n\n")
 
     scroll_terminal()  # Force flush the output
     # Print the current time
@@ -0,0 +1,379 @@
+import os
+import sys
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+
+from .helpers import scan_local_tree, is_hidden
+from .manifest import manifest
+
+
+# inotify event bits, from linux/inotify.h
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+watch_mask = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+
+# struct inotify_event: int wd, uint32 mask, uint32 cookie, uint32 len, followed by len bytes of name
+event_header = struct.Struct('iIII')
+
+
+def load_inotify():
+    # inotify is Linux only, everywhere else the folders are polled
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def is_tracked(relative_path, slus_folder):
+    # Same rules as scan_local_tree: no hidden entries, no user-customs, nothing outside the SLUS folder
+    parts = relative_path.split(os.sep)
+    if any(is_hidden(part) or part == 'user-customs' for part in parts):
+        return False
+    return not slus_folder or parts[0] == slus_folder
+
+
+def settled_mtime(mtime_ns):
+    # Coarse timestamps (2 seconds on FAT drives) can hide a change made right after a folder was read,
+    # so a folder changed that recently is kept as unknown and read again on the next poll
+    return mtime_ns if mtime_ns < time.time_ns() - 2 * 10 ** 9 else None
+
+
+class TextureWatcher:
+    """Keeps the listing of the textures folder from the last full scan up to date while the app is open,
+    so the next scan only looks at the paths that changed instead of walking the whole folder"""
+    def __init__(self, directory, slus_folder, poll_seconds=30):
+        self.directory = os.path.abspath(directory)
+        self.slus_folder = slus_folder
+        self.poll_seconds = poll_seconds
+        self.libc = load_inotify()
+        self.mode = "inotify" if self.libc else "polling"
+        # Paths that changed since the listing was last brought up to date (files, or folders to read again
+        # with everything in them), and folders whose files have to be listed again (polling only)
+        self.dirty = set()
+        self.dirty_folders = set()
+        # Relative path -> (size, mtime_ns), None until a full scan has run while watching
+        self.files = None
+        # Bumped whenever changes may have been missed, so a listing built before can't be kept
+        self.generation = 0
+        self.lock = threading.Lock()
+        # Held while events are read (or folders polled), so a scan can catch up on them first
+        self.read_lock = threading.Lock()
+        self.tree_lock = threading.Lock()
+        self.ready = threading.Event()
+        self.stop_event = threading.Event()
+        self.fd = None
+        # inotify watch descriptor -> relative folder
+        self.watches = {}
+        # Relative folder -> mtime_ns (polling)
+        self.folder_mtimes = {}
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="texture-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        try:
+            if self.mode == "inotify" and not self.start_inotify():
+                self.mode = "polling"
+            if self.mode == "polling":
+                self.register_folders('')
+            self.ready.set()
+
+            while not self.stop_event.is_set():
+                if self.mode == "inotify":
+                    if select.select([self.fd], [], [], 1.0)[0]:
+                        with self.read_lock:
+                            self.read_events()
+                elif not self.stop_event.wait(self.poll_seconds):
+                    with self.read_lock:
+                        self.poll()
+        finally:
+            self.lost_track()
+            self.close_inotify()
+
+    def mark_dirty(self, relative_path):
+        with self.lock:
+            self.dirty.add(relative_path)
+
+    def lost_track(self):
+        with self.lock:
+            self.files = None
+            self.dirty.clear()
+            self.dirty_folders.clear()
+            self.generation += 1
+
+    def walk_folders(self, relative_folder):
+        # The folder and every folder under it that a scan would read
+        pending = [relative_folder]
+        while pending:
+            folder = pending.pop()
+            yield folder
+            try:
+                with os.scandir(os.path.join(self.directory, folder)) as scan:
+                    for entry in scan:
+                        relative_path = os.path.join(folder, entry.name)
+                        if entry.is_dir(follow_symlinks=False) and is_tracked(relative_path, self.slus_folder):
+                            pending.append(relative_path)
+            except OSError:
+                continue
+
+    # - - - inotify (Linux) - - -
+
+    def start_inotify(self):
+        fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return False
+        self.fd = fd
+        if not self.add_watches(''):
+            self.close_inotify()
+            return False
+        return True
+
+    def close_inotify(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self.watches.clear()
+
+    def add_watches(self, relative_folder):
+        for folder in self.walk_folders(relative_folder):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(os.path.join(self.directory, folder)), watch_mask)
+            if wd < 0:
+                # Already gone again, the event in its parent covers it
+                if ctypes.get_errno() in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                # Usually out of watches (fs.inotify.max_user_watches)
+                return False
+            self.watches[wd] = folder
+        return True
+
+    def read_events(self):
+        while self.fd is not None:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = event_header.unpack_from(data, offset)
+                name_start = offset + event_header.size
+                name = os.fsdecode(data[name_start:name_start + length].rstrip(b'\0'))
+                offset = name_start + length
+                if not self.handle_event(wd, mask, name):
+                    # Ran out of watches on a new folder: carry on by polling
+                    self.close_inotify()
+                    self.mode = "polling"
+                    self.register_folders('')
+                    self.lost_track()
+                    return
+
+    def handle_event(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            # The kernel dropped events
+            self.lost_track()
+            return True
+        folder = self.watches.get(wd)
+        if folder is None:
+            return True
+        if mask & IN_IGNORED:
+            del self.watches[wd]
+            return True
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            # Any other folder also shows up as an event in its parent, but nothing watches above the textures folder
+            if folder == '':
+                self.lost_track()
+            return True
+
+        relative_path = os.path.join(folder, name)
+        if not is_tracked(relative_path, self.slus_folder):
+            return True
+        if mask & IN_ISDIR:
+            if mask & IN_MOVED_FROM:
+                # Events from a moved folder would still come in under its old path. A move within the textures
+                # folder adds it again under the new path (same inode, same watch descriptor).
+                prefix = relative_path + os.sep
+                for watched_wd, watched_folder in list(self.watches.items()):
+                    if watched_folder == relative_path or watched_folder.startswith(prefix):
+                        del self.watches[watched_wd]
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                if not self.add_watches(relative_path):
+                    return False
+        self.mark_dirty(relative_path)
+        return True
+
+    # - - - Polling (everywhere else) - - -
+
+    def register_folders(self, relative_folder):
+        # Stat before the folder is listed, so a change in between shows up as a changed mtime on the next poll
+        for folder in self.walk_folders(relative_folder):
+            try:
+                self.folder_mtimes[folder] = settled_mtime(os.stat(os.path.join(self.directory, folder)).st_mtime_ns)
+            except OSError:
+                continue
+
+    def forget_folders(self, relative_folder):
+        prefix = relative_folder + os.sep
+        for folder in [folder for folder in self.folder_mtimes if folder == relative_folder or folder.startswith(prefix)]:
+            del self.folder_mtimes[folder]
+
+    def poll(self):
+        # Adding, removing or renaming anything in a folder changes the folder's mtime, so only folders are stat'ed
+        for folder, mtime_ns in list(self.folder_mtimes.items()):
+            # Already handled along with its parent
+            if folder not in self.folder_mtimes:
+                continue
+            try:
+                current = os.stat(os.path.join(self.directory, folder)).st_mtime_ns
+            except OSError:
+                current = None
+            if current is not None and current == mtime_ns:
+                continue
+            if current is None:
+                if folder == '':
+                    self.lost_track()
+                    return
+                self.forget_folders(folder)
+                self.mark_dirty(folder)
+                continue
+
+            known = {known for known in self.folder_mtimes if known != folder and os.path.dirname(known) == folder}
+            found = set(self.walk_subfolders(folder))
+            for subfolder in found - known:
+                self.register_folders(subfolder)
+                self.mark_dirty(subfolder)
+            for subfolder in known - found:
+                self.forget_folders(subfolder)
+                self.mark_dirty(subfolder)
+            self.folder_mtimes[folder] = settled_mtime(current)
+            with self.lock:
+                self.dirty_folders.add(folder)
+
+    def walk_subfolders(self, folder):
+        try:
+            with os.scandir(os.path.join(self.directory, folder)) as scan:
+                for entry in scan:
+                    relative_path = os.path.join(folder, entry.name)
+                    if entry.is_dir(follow_symlinks=False) and is_tracked(relative_path, self.slus_folder):
+                        yield relative_path
+        except OSError:
+            return
+
+    # - - - Scanning - - -
+
+    def catch_up(self):
+        with self.read_lock:
+            if self.mode == "inotify":
+                self.read_events()
+            else:
+                self.poll()
+
+    def refresh(self, files, dirty, dirty_folders):
+        # One pass to drop everything at or under the changed paths, and the files directly in re-listed folders
+        prefixes = tuple(path + os.sep for path in dirty)
+        removed = [path for path in files if path in dirty or path.startswith(prefixes) or os.path.dirname(path) in dirty_folders]
+        for path in removed:
+            del files[path]
+
+        for path in dirty:
+            full_path = os.path.join(self.directory, path)
+            if os.path.isdir(full_path) and not os.path.islink(full_path):
+                for relative_path, size, mtime_ns in scan_local_tree(full_path):
+                    files[os.path.join(path, relative_path)] = (size, mtime_ns)
+            elif os.path.isfile(full_path) and (os.sep in path or not self.slus_folder):
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                files[path] = (stat.st_size, stat.st_mtime_ns)
+
+        for folder in dirty_folders:
+            if folder == '' and self.slus_folder:
+                continue
+            try:
+                with os.scandir(os.path.join(self.directory, folder)) as scan:
+                    for entry in scan:
+                        if not is_hidden(entry.name) and entry.is_file():
+                            stat = entry.stat()
+                            files[os.path.join(folder, entry.name)] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue
+
+        # Deleted files won't be hashed again, so their manifest entries can go
+        for path in removed:
+            if path not in files:
+                manifest.forget(os.path.join(self.directory, path))
+
+    def tree(self):
+        """Sorted (relative path, size, mtime_ns) records of the textures folder, and whether only changed paths were checked"""
+        with self.tree_lock:
+            if not self.ready.is_set() or not self.thread.is_alive():
+                # Not watching (yet), so changes from now on could be missed
+                return sorted(scan_local_tree(self.directory, self.slus_folder)), False
+
+            self.catch_up()
+            with self.lock:
+                files, generation = self.files, self.generation
+                dirty, self.dirty = self.dirty, set()
+                dirty_folders, self.dirty_folders = self.dirty_folders, set()
+
+            incremental = files is not None
+            if incremental:
+                self.refresh(files, dirty, dirty_folders)
+            else:
+                files = {relative_path: (size, mtime_ns) for relative_path, size, mtime_ns in scan_local_tree(self.directory, self.slus_folder)}
+
+            with self.lock:
+                # Only kept if no changes were missed while it was being built
+                if self.generation == generation:
+                    self.files = files
+
+            return sorted((path, size, mtime_ns) for path, (size, mtime_ns) in files.items()), incremental
+
+
+# The watcher started by the app, when watch_textures is turned on
+texture_watcher = None
+
+
+def start_watching(directory, slus_folder, poll_seconds=30):
+    global texture_watcher
+    if texture_watcher is None and directory and os.path.isdir(directory):
+        texture_watcher = TextureWatcher(directory, slus_folder, poll_seconds)
+        texture_watcher.start()
+    return texture_watcher
+
+
+def local_tree(directory, slus_folder):
+    """Sorted (relative path, size, mtime_ns) records of the textures folder, and whether only changed paths were checked"""
+    watcher = texture_watcher
+    if watcher is not None and watcher.directory == os.path.abspath(directory) and watcher.slus_folder == slus_folder:
+        return watcher.tree()
+    return sorted(scan_local_tree(directory, slus_folder)), False